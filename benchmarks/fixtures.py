@@ -0,0 +1,188 @@
+"""Offline BLS and FRED fixtures for the benchmark suite
+
+Responses are generated deterministically, so every run replays exactly
+the same data without network access. install() points the BLS and FRED
+clients and the reference file loader at the fixtures.
+"""
+import json
+import os
+import random
+import time
+import zlib
+
+import bls_query
+import bls_reference
+import fred
+from bls_query import INDUSTRY_CODES, JoltsSpec
+
+START_YEAR = 2003
+END_YEAR = 2026
+ELEMENTS = ("QU", "HI", "JO", "LD", "TS")
+STATE_CODES = ["00"] + [f"{i:02d}" for i in range(1, 57) if i not in (3, 7, 14, 43, 52)]
+
+
+def scale_specs(scale):
+    """Return the JoltsSpecs downloaded at a benchmark scale
+
+    "national": the national series of each element
+    "states": every state for each element, as main.py loads them
+    "cube": every state for every industry of one element
+    """
+    if scale == "national":
+        return [
+            JoltsSpec(name=e, element=e, sa=sa, geography="industry", industries=("000000",))
+            for e in ELEMENTS
+            for sa in ("S", "U")
+        ]
+    if scale == "states":
+        return [
+            JoltsSpec(name=e, element=e, sa=sa, annual=sa == "U")
+            for e in ELEMENTS
+            for sa in ("S", "U")
+        ]
+    if scale == "cube":
+        return [
+            JoltsSpec(name="QU", element="QU", sa=sa, industry=code, annual=sa == "U")
+            for code in INDUSTRY_CODES
+            for sa in ("S", "U")
+        ]
+    raise ValueError(f"Unknown scale: {scale}")
+
+
+def _series_payload(series_id, start_year, end_year, annual):
+    rng = random.Random(zlib.crc32(series_id.encode()))
+    data = []
+    for year in range(end_year, start_year - 1, -1):
+        periods = [f"M{m:02d}" for m in range(12, 0, -1)]
+        if annual:
+            periods.insert(0, "M13")
+        for period in periods:
+            footnotes = [{"code": "P", "text": "preliminary"}] if year == END_YEAR else [{}]
+            data.append(
+                {
+                    "year": str(year),
+                    "period": period,
+                    "periodName": period,
+                    "value": f"{rng.randint(0, 80) / 10:.1f}",
+                    "footnotes": footnotes,
+                }
+            )
+    return {"seriesID": series_id, "data": data}
+
+
+class FixtureResponse:
+    def __init__(self, content, status_code=200):
+        self.content = content
+        self.status_code = status_code
+        self.headers = {}
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8")
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class FixtureSession:
+    """Stand-in for requests.Session replaying the BLS and FRED API fixtures
+
+    Series payloads are encoded once and cached, so only the client side
+    of a request (building it and decoding the response) is timed.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.bytes_in = 0
+        self._encoded = {}
+
+    def _encode(self, series_id, start_year, end_year, annual):
+        key = (series_id, start_year, end_year, annual)
+        if key not in self._encoded:
+            payload = _series_payload(series_id, start_year, end_year, annual)
+            self._encoded[key] = json.dumps(payload)
+        return self._encoded[key]
+
+    def post(self, url, data=None, headers=None, **kwargs):
+        request = json.loads(data)
+        start_year, end_year = int(request["startyear"]), int(request["endyear"])
+        annual = request.get("annualaverage") == "true"
+        series = ",".join(
+            self._encode(x, start_year, end_year, annual) for x in request["seriesid"]
+        )
+        content = (
+            '{"status":"REQUEST_SUCCEEDED","Results":{"series":[' + series + "]}}"
+        ).encode("utf-8")
+        self.calls += 1
+        self.bytes_in += len(content)
+        return FixtureResponse(content)
+
+    def get(self, url, params=None, **kwargs):
+        start, end = params["observation_start"], params["observation_end"]
+        observations = [x for x in fred_observations() if start <= x["date"] <= end]
+        content = json.dumps({"observations": observations}).encode("utf-8")
+        self.calls += 1
+        self.bytes_in += len(content)
+        return FixtureResponse(content)
+
+    def warm(self, plan, windows):
+        """Encode the payloads of a request plan ahead of timing"""
+        for series_ids, annual in plan:
+            for start_year, end_year, _ in windows:
+                for x in series_ids:
+                    self._encode(x, start_year, end_year, annual)
+
+
+def reference_files():
+    """Return the contents of the jt.state and jt.industry fixtures"""
+    states = ["state_code\tstate_text\tdisplay_level\tselectable\tsort_sequence"]
+    states += [
+        f"{code}\t{'Total US' if code == '00' else f'State {code}'}\t0\tT\t{i}"
+        for i, code in enumerate(STATE_CODES)
+    ]
+    industries = ["industry_code\tindustry_text\tdisplay_level\tselectable\tsort_sequence"]
+    industries += [f"000000\tTotal nonfarm\t0\tT\t0"]
+    industries += [
+        f"{code}\t{label}\t1\tT\t{i + 1}" for i, (code, label) in enumerate(INDUSTRY_CODES.items())
+    ]
+    return {
+        "jt.state": "\r\n".join(states) + "\r\n",
+        "jt.industry": "\r\n".join(industries) + "\r\n",
+    }
+
+
+def fred_observations(start_year=1854, end_year=END_YEAR):
+    """Return a monthly USRECM-like indicator as FRED observations"""
+    recessions = [(2001, 3, 2001, 11), (2007, 12, 2009, 6), (2020, 2, 2020, 4)]
+    observations = []
+    for year in range(start_year, end_year + 1):
+        for month in range(1, 13):
+            flag = any(
+                (y0, m0) <= (year, month) <= (y1, m1) for y0, m0, y1, m1 in recessions
+            )
+            observations.append({"date": f"{year}-{month:02d}-01", "value": str(int(flag))})
+    return observations
+
+
+def install():
+    """Serve BLS and FRED requests and reference files from the fixtures
+
+    Returns the FixtureSession used for API requests.
+    """
+    os.makedirs(bls_reference.REFERENCE_DIR, exist_ok=True)
+    for filename, text in reference_files().items():
+        path = os.path.join(bls_reference.REFERENCE_DIR, filename)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        # mark the files as just revalidated so they are never downloaded
+        with open(f"{path}.json", "w", encoding="utf-8") as f:
+            json.dump({"checked": time.time() + 365 * 24 * 60 * 60}, f)
+    bls_reference.reference_table.cache_clear()
+    bls_reference.reference_labels.cache_clear()
+    session = FixtureSession()
+    bls_query._get_session = lambda: session
+    fred._get_session = lambda: session
+    return session
@@ -0,0 +1,266 @@
+"""Offline benchmarks of the fetch, parse and load stages
+
+Run from the repository root:
+
+    python benchmarks/run_benchmarks.py --save benchmarks/baseline.json
+    python benchmarks/run_benchmarks.py --compare benchmarks/baseline.json
+
+BLS and FRED responses come from deterministic fixtures (see fixtures.py),
+so no network access is needed. Tables are always loaded into and read
+from local snapshots. The PostgreSQL upload and download stages run
+against the database in BENCH_PG_STRING (a local server, never bit.io)
+and are skipped, with a notice, if it is not set.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Keep the reference files and caches of benchmark runs apart from real ones;
+# the directory is removed when main returns, or else at exit
+BENCH_CACHE = tempfile.TemporaryDirectory(prefix="bls_bench_")
+os.environ["BLS_CACHE_DIR"] = BENCH_CACHE.name
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pandas as pd  # noqa: E402
+
+import fixtures  # noqa: E402
+from bls_query import (  # noqa: E402
+    BLS_MAX_WORKERS,
+    concat_jolts_frames,
+    fetch_bls_requests,
+    get_state_fips_codes,
+    parse_jolts_spec,
+    plan_bls_requests,
+    year_windows,
+)
+from fred import fred_observations, parse_observations, recession_intervals  # noqa: E402
+from upload_download_bitdotio import (  # noqa: E402
+    download_dataset,
+    get_engine,
+    read_snapshot,
+    upload_table,
+    write_snapshot,
+)
+
+SCALES = ("national", "states", "cube")
+# Slowdowns of less than this many seconds are noise, whatever the ratio
+MIN_DELTA = 0.005
+
+
+def measure(func, repeat):
+    """Return the result of func, its best time and its peak traced memory
+
+    As in timeit, garbage collection is turned off while timing, so its
+    pauses do not land on whichever stage happens to trigger them.
+    """
+    tracemalloc.start()
+    result = func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            result = func()
+            times.append(time.perf_counter() - start)
+        finally:
+            gc.enable()
+    return result, {"seconds": min(times), "peak_mb": peak / 2**20}
+
+
+def bench_scale(scale, session, repeat, pg_string=None, schema="public"):
+    specs = fixtures.scale_specs(scale)
+    fips = get_state_fips_codes()
+    state_codes = list(fips["state_code"])
+    stages = {}
+
+    plan, stages["plan"] = measure(lambda: plan_bls_requests(specs, state_codes), repeat)
+    session.warm(plan, year_windows(fixtures.START_YEAR, fixtures.END_YEAR))
+
+    calls = session.calls
+
+    def fetch():
+        return fetch_bls_requests(
+            "bench",
+            plan,
+            fixtures.START_YEAR,
+            fixtures.END_YEAR,
+            max_workers=BLS_MAX_WORKERS,
+            rate_limiter=None,
+            cache=None,
+        )
+
+    responses, stages["fetch"] = measure(fetch, repeat)
+    stages["fetch"]["api_calls"] = (session.calls - calls) // (repeat + 1)
+    response_series = {s["seriesID"]: s for series in responses for s in series}
+
+    def parse():
+        frames = []
+        for spec in specs:
+            spec_series = [
+                response_series[x] for x in spec.series_ids(state_codes) if x in response_series
+            ]
+            df = parse_jolts_spec(spec_series, spec, fips)
+            df["seasonal_adjustment"] = spec.sa
+            frames.append(df)
+        return concat_jolts_frames(frames)
+
+    df, stages["parse"] = measure(parse, repeat)
+    stages["parse"]["rows"] = len(df)
+    stages["parse"]["series"] = len(response_series)
+
+    table = f"bench_{scale}"
+    with tempfile.TemporaryDirectory(prefix="snapshots_", dir=BENCH_CACHE.name) as root:
+        _, stages["upload_snapshot"] = measure(
+            lambda: write_snapshot(df, table, root=root), repeat
+        )
+        _, stages["download_snapshot"] = measure(
+            lambda: read_snapshot(table, root=root), repeat
+        )
+
+    if pg_string:
+        target = f'"{schema}"."{table}"'
+        for copy_format in ("csv", "binary"):
+            _, stages[f"upload_{copy_format}"] = measure(
+                lambda: upload_table(df, schema, table, pg_string, copy_format=copy_format),
+                repeat,
+            )
+        for method in ("copy", "read_sql"):
+            _, stages[f"download_{method}"] = measure(
+                lambda: download_dataset(target, pg_string, method=method), repeat
+            )
+        with get_engine(pg_string).begin() as conn:
+            conn.execute(f"DROP TABLE IF EXISTS {target}")
+    return stages
+
+
+def bench_fred(repeat):
+    observations = [[x["date"], x["value"]] for x in fixtures.fred_observations()]
+    start_date, end_date = observations[0][0], observations[-1][0]
+    stages = {}
+
+    with tempfile.TemporaryDirectory(prefix="fred_", dir=BENCH_CACHE.name) as path:
+
+        def fetch():
+            # an empty store each time, so the whole series is requested
+            shutil.rmtree(path, ignore_errors=True)
+            return fred_observations("bench", "USRECM", start_date, end_date, path=path)
+
+        _, stages["fetch"] = measure(fetch, repeat)
+    recessions, stages["parse"] = measure(lambda: parse_observations(observations), repeat)
+    _, stages["intervals"] = measure(lambda: recession_intervals(recessions), repeat)
+    return stages
+
+
+def compare(results, baseline, tolerance, min_delta=MIN_DELTA):
+    """Print the change of each stage and return the regressed stages
+
+    A stage regresses if it is more than tolerance slower than the
+    baseline, and by more than min_delta seconds, so that millisecond
+    stages are not failed by timer noise. Stages of the baseline missing
+    from results count as regressions, so a run that skipped them cannot
+    pass for one that kept up. Groups (scales) left out of the run are
+    not compared.
+    """
+    regressions = []
+    for group, stages in results.items():
+        for stage in baseline.get(group, {}):
+            if stage not in stages:
+                regressions.append(f"{group}/{stage}")
+                print(f"{group:>10} {stage:<18} missing from this run")
+    for group, stages in results.items():
+        for stage, result in stages.items():
+            base = baseline.get(group, {}).get(stage)
+            if base is None:
+                print(f"{group:>10} {stage:<18} not in the baseline")
+                continue
+            ratio = result["seconds"] / max(base["seconds"], 1e-9)
+            flag = ""
+            if ratio > 1 + tolerance and result["seconds"] - base["seconds"] > min_delta:
+                regressions.append(f"{group}/{stage}")
+                flag = "  REGRESSION"
+            print(
+                f"{group:>10} {stage:<18} {base['seconds']:9.4f}s -> "
+                f"{result['seconds']:9.4f}s ({ratio:5.2f}x){flag}"
+            )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", nargs="+", choices=SCALES, default=list(SCALES))
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per stage")
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="compare the results with this JSON baseline")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.25, help="allowed slowdown before failing"
+    )
+    parser.add_argument(
+        "--min-delta",
+        type=float,
+        default=MIN_DELTA,
+        help="slowdown in seconds below which a stage never fails",
+    )
+    args = parser.parse_args(argv)
+    try:
+        return _run(args)
+    finally:
+        BENCH_CACHE.cleanup()
+
+
+def _run(args):
+
+    pg_string = os.environ.get("BENCH_PG_STRING")
+    schema = os.environ.get("BENCH_PG_SCHEMA", "public")
+    session = fixtures.install()
+    if not pg_string:
+        print("BENCH_PG_STRING is not set: skipping the PostgreSQL upload and download stages")
+
+    results = {}
+    for group in list(args.scales) + ["fred"]:
+        if group == "fred":
+            results[group] = bench_fred(args.repeat)
+        else:
+            results[group] = bench_scale(group, session, args.repeat, pg_string, schema)
+        for stage, result in results[group].items():
+            print(
+                f"{group:>10} {stage:<18} {result['seconds']:9.4f}s "
+                f"peak {result['peak_mb']:8.1f} MiB"
+            )
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "database": bool(pg_string),
+        },
+        "results": results,
+    }
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.tolerance, args.min_delta)
+        if regressions:
+            print(f"Slower than or missing from the baseline: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,238 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from bls_query import get_state_fips_codes, jolts_frame
+from bls_reference import REFERENCE_DIR, download_reference_file, reference_labels
+from jolts_codec import JOLTS_ID_WIDTH
+from telemetry import TELEMETRY
+
+# Flat files holding the series of each JOLTS element, and of every element
+FLATFILE_DATA_FILES = {
+    "JO": "jt.data.2.JobOpenings",
+    "HI": "jt.data.3.Hires",
+    "TS": "jt.data.4.TotalSeparations",
+    "QU": "jt.data.5.Quits",
+    "LD": "jt.data.6.LayoffsDischarges",
+    "OS": "jt.data.7.OtherSeparations",
+}
+FLATFILE_ALL_ITEMS = "jt.data.1.AllItems"
+# Rows of a flat file parsed at a time
+FLATFILE_CHUNK_ROWS = 500_000
+FLATFILE_COLUMNS = ["series_id", "year", "period", "value", "footnote_codes"]
+
+
+def flatfile_name(element):
+    """Return the name of the flat file holding the series of an element"""
+    return FLATFILE_DATA_FILES.get(element, FLATFILE_ALL_ITEMS)
+
+
+def read_flatfile(
+    filename,
+    series_ids,
+    start_year,
+    end_year,
+    chunksize=FLATFILE_CHUNK_ROWS,
+    memory_map=True,
+    path=REFERENCE_DIR,
+    local_path=None,
+):
+    """Read the observations of some series from a BLS JT flat file
+
+    The file is downloaded once (see download_reference_file) and parsed
+    chunksize rows at a time. Series IDs are compared as fixed-width byte
+    strings, and only the rows of the requested series and years are kept
+    from each chunk, so memory use follows the selected rows rather than
+    the size of the file.
+
+    Parameters
+    ----------
+    filename : str
+        Name of the flat file, e.g. "jt.data.5.Quits"
+    series_ids : iterable of str
+        Series IDs to keep
+    start_year : int
+        First year to keep
+    end_year : int
+        Last year to keep
+    chunksize : int
+        Number of rows parsed at a time
+    memory_map : bool
+        If true, memory-map the local copy of the file while parsing it
+    path : str
+        Directory holding the downloaded copy of the file
+    local_path : str or None
+        Local copy of the file to read instead of downloading it
+
+    Returns
+    -------
+    tuple
+        series_ids, columns and footnotes, as returned by parse_bls_series
+    """
+    start = time.perf_counter()
+    if local_path is None:
+        local_path = download_reference_file(filename, path=path)
+    wanted = pd.Index(np.asarray(list(series_ids), dtype=f"S{JOLTS_ID_WIDTH}"))
+
+    parts = []
+    reader = pd.read_csv(
+        local_path,
+        sep="\t",
+        header=0,
+        names=FLATFILE_COLUMNS,
+        dtype={"series_id": str, "year": np.int64, "period": str, "value": str},
+        keep_default_na=False,
+        chunksize=chunksize,
+        memory_map=memory_map,
+    )
+    for chunk in reader:
+        ids = chunk["series_id"].to_numpy().astype(f"S{JOLTS_ID_WIDTH}")
+        years = chunk["year"].to_numpy()
+        keep = pd.Index(ids).isin(wanted) & (years >= start_year) & (years <= end_year)
+        if keep.any():
+            parts.append(
+                {
+                    "series_id": ids[keep],
+                    "year": years[keep],
+                    "period": chunk["period"].to_numpy()[keep],
+                    "value": chunk["value"].to_numpy()[keep],
+                    "footnote_codes": chunk["footnote_codes"].to_numpy()[keep],
+                }
+            )
+    rows = {
+        k: np.concatenate([x[k] for x in parts]) if parts else np.empty(0, dtype=object)
+        for k in FLATFILE_COLUMNS
+    }
+
+    series_pos, distinct_ids = pd.factorize(rows["series_id"])
+    # Periods ("M01" to "M13") and footnote codes take few distinct values,
+    # so parse each once
+    period_codes, distinct_periods = pd.factorize(rows["period"])
+    months = np.array([int(x.strip()[1:]) for x in distinct_periods], dtype=np.int64)
+    footnote_pos, distinct_codes = pd.factorize(rows["footnote_codes"])
+    labels = reference_labels("footnote")
+    # the API reports the first footnote of an observation
+    footnotes = [
+        labels.get(x.split(",")[0].strip(), np.nan) if x.strip() else np.nan
+        for x in distinct_codes
+    ]
+    columns = {
+        "series": series_pos.astype(np.int32),
+        "year": rows["year"].astype(np.int64),
+        "month": months[period_codes] if len(period_codes) else np.empty(0, dtype=np.int64),
+        "value": pd.to_numeric(rows["value"], errors="coerce").astype(np.float64),
+        "footnote": footnote_pos.astype(np.int32),
+    }
+    TELEMETRY.observe("flatfile_read", time.perf_counter() - start, file=filename)
+    TELEMETRY.count("bytes_in", os.path.getsize(local_path), source="flatfile")
+    TELEMETRY.count("rows_read", len(series_pos), source="flatfile")
+    return [x.decode() for x in distinct_ids], columns, footnotes
+
+
+def select_series(parsed, series_ids, start_year=None):
+    """Restrict parsed flat file columns to some series
+
+    Rows are ordered like BLS API responses: by series in the order of
+    series_ids, then newest first.
+
+    Parameters
+    ----------
+    parsed : tuple
+        series_ids, columns and footnotes, as returned by read_flatfile
+    series_ids : list of str
+        Series IDs to keep
+    start_year : int or None
+        First year to keep; None for every year read
+
+    Returns
+    -------
+    tuple
+        series_ids (those found, in the given order), columns and footnotes
+    """
+    parsed_ids, columns, footnotes = parsed
+    found = set(parsed_ids)
+    selected = [x for x in series_ids if x in found]
+    position = {x: i for i, x in enumerate(selected)}
+    new_pos = np.array([position.get(x, -1) for x in parsed_ids], dtype=np.int32)
+    series = new_pos[columns["series"]] if len(parsed_ids) else columns["series"]
+    keep = series >= 0
+    if start_year is not None:
+        keep &= columns["year"] >= start_year
+    order = np.lexsort((-columns["month"][keep], -columns["year"][keep], series[keep]))
+    selected_columns = {k: v[keep][order] for k, v in columns.items()}
+    selected_columns["series"] = series[keep][order]
+    return selected, selected_columns, footnotes
+
+
+def parse_flatfile_spec(parsed, spec, fips=None, compact=False, start_year=None):
+    """Build the DataFrame for a JoltsSpec from flat file columns
+
+    The frame has the same columns and dtypes as parse_jolts_spec, and
+    only holds the years from start_year onward if it is given.
+    """
+    state_codes = list(fips["state_code"]) if fips is not None else ["00"]
+    series_ids, columns, footnotes = select_series(
+        parsed, spec.series_ids(state_codes), start_year=start_year
+    )
+    return jolts_frame(series_ids, columns, footnotes, spec, fips, compact=compact)
+
+
+def flatfile_jolts_specs(
+    specs,
+    start_year=2018,
+    end_year=2022,
+    compact=False,
+    memory_map=True,
+    chunksize=FLATFILE_CHUNK_ROWS,
+):
+    """Load several JOLTS specs from the BLS flat files
+
+    Each flat file is downloaded and read once for every spec it covers.
+    This replaces the hundreds of API requests of a full-history or
+    full-cube load with one download per element.
+
+    Parameters
+    ----------
+    specs : list of JoltsSpec
+        Specs to load
+    start_year : int
+        Starting year of JOLTS data to load
+    end_year : int
+        Ending year of JOLTS data to load
+    compact : bool
+        If true, return frames with the dtypes of compact_jolts_frame
+    memory_map : bool
+        If true, memory-map the flat files while parsing them
+    chunksize : int
+        Number of rows parsed at a time
+
+    Returns
+    -------
+    list of pandas.DataFrame
+        One DataFrame per spec, in the same order as specs, as returned by
+        fetch_jolts_specs
+    """
+    fips = get_state_fips_codes()
+    state_codes = list(fips["state_code"])
+    files = {}
+    for spec in specs:
+        files.setdefault(flatfile_name(spec.element), set()).update(
+            spec.series_ids(state_codes)
+        )
+    parsed = {
+        filename: read_flatfile(
+            filename,
+            series_ids,
+            start_year,
+            end_year,
+            chunksize=chunksize,
+            memory_map=memory_map,
+        )
+        for filename, series_ids in files.items()
+    }
+    return [
+        parse_flatfile_spec(parsed[flatfile_name(spec.element)], spec, fips, compact)
+        for spec in specs
+    ]
@@ -1,8 +1,72 @@
+import datetime
+import hashlib
 import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 
 import numpy as np
 import pandas as pd
 import requests
+from pandas.api.types import union_categoricals
+
+from bls_reference import BLS_CACHE_DIR, reference_labels, reference_table
+from filters import apply_filters
+from fred import FRED_CACHE_DIR, fred_observations
+from jolts_codec import decode_jolts_ids, encode_jolts_ids
+from telemetry import TELEMETRY
+
+BLS_API_URL = "https://api.bls.gov/publicAPI/v2/timeseries/data/"
+# Default number of concurrent BLS API requests
+BLS_MAX_WORKERS = 4
+# BLS allows 50 requests per 10 seconds for registered users
+BLS_REQUESTS_PER_SECOND = 5.0
+# Maximum series IDs per request for registered BLS API users
+BLS_MAX_SERIES = 50
+# Maximum years per request for registered BLS API users
+BLS_MAX_YEARS = 20
+
+# On-disk response cache settings
+BLS_RESPONSE_CACHE_DIR = os.path.join(BLS_CACHE_DIR, "responses")
+BLS_CACHE_MAX_BYTES = 512 * 1024 * 1024
+# Years at the end of a request that BLS may still revise (the "tail")
+BLS_REVISION_YEARS = 2
+# Months behind the latest stored date re-downloaded by incremental runs
+JOLTS_REVISION_MONTHS = 12
+# Time to live (seconds) for cached tail and historical responses
+BLS_TAIL_TTL = 12 * 60 * 60
+BLS_HISTORY_TTL = 30 * 24 * 60 * 60
+
+# Default industries downloaded by jolts_national_by_industry, with the
+# labels used for them (other industries are labeled from jt.industry)
+INDUSTRY_CODES = {
+    "110000": "Agriculture, Forestry, Fishing and Hunting",
+    "210000": "Mining, Quarrying, and Oil and Gas Extraction",
+    "220000": "Utilities",
+    "230000": "Construction",
+    "310000": "Manufacturing",
+    "320000": "Manufacturing",
+    "330000": "Manufacturing",
+    "420000": "Wholesale Trade",
+    "440000": "Retail Trade",
+    "450000": "Retail Trade",
+    "480000": "Transportation and Warehousing",
+    "490000": "Transportation and Warehousing",
+    "510000": "Information",
+    "520000": "Finance and Insurance",
+    "530000": "Real Estate and Rental and Leasing",
+    "540000": "Professional, Scientific, and Technical Services",
+    "550000": "Management of Companies and Enterprises",
+    "560000": "Administrative and Support and Waste Management and Remediation Services",
+    "610000": "Educational Services",
+    "620000": "Health Care and Social Assistance",
+    "710000": "Arts, Entertainment, and Recreation",
+    "720000": "Accommodation and Food Services",
+    "810000": "Other Services (except Public Administration)",
+    "820000": "Public Administration",
+}
 
 
 def get_state_fips_codes():
@@ -10,15 +74,15 @@ def get_state_fips_codes():
     Returns dataframe of state FIPS codes and state names
     from the BLS JT series reference
     """
-    url = "https://download.bls.gov/pub/time.series/jt/jt.state"
-    data = requests.get(url)
-    data_fmt = data.content.decode("utf-8").split("\r\n")
-    df = pd.DataFrame(
-        [x.split("\t") for x in data_fmt[1:-1]],
-        columns=data_fmt[0].split("\t"),
-    ).loc[:, ["state_code", "state_text"]]
+    return reference_table("state").loc[:, ["state_code", "state_text"]]
 
-    return df
+
+def industry_label(code):
+    """Return the label of a JOLTS industry code, or NaN if it is unknown"""
+    label = INDUSTRY_CODES.get(code)
+    if label is None:
+        label = reference_labels("industry").get(code, np.nan)
+    return label
 
 
 def construct_jolts_id(
@@ -31,16 +95,21 @@ def construct_jolts_id(
     element="QU",
     rate_level="R",
 ):
-    """Helper function for constructing a JOLTS ID for API requests"""
-    return (
-        prefix
-        + sa
-        + industry
-        + state
-        + area
-        + size_class
-        + element
-        + rate_level
+    """Helper function for constructing a JOLTS ID for API requests
+
+    See encode_jolts_ids to build many IDs at once.
+    """
+    return str(
+        encode_jolts_ids(
+            prefix=prefix,
+            sa=sa,
+            industry=industry,
+            state=state,
+            area=area,
+            size_class=size_class,
+            element=element,
+            rate_level=rate_level,
+        )
     )
 
 
@@ -50,6 +119,771 @@ def batch(iterable, n=1):
         yield iterable[ndx : min(ndx + n, l)]
 
 
+class TokenBucket:
+    """Thread-safe token-bucket rate limiter
+
+    Parameters
+    ----------
+    rate : float
+        Tokens added to the bucket per second
+    capacity : int
+        Maximum number of tokens (burst size)
+    """
+
+    def __init__(self, rate=BLS_REQUESTS_PER_SECOND, capacity=None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1, int(rate))
+        self._tokens = float(self.capacity)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available, then consume it"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._last) * self.rate
+                )
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+# Shared by every fetch so concurrent calls stay within the API limit
+BLS_RATE_LIMITER = TokenBucket()
+
+class ResponseCache:
+    """Content-addressed on-disk cache of API responses
+
+    Entries are JSON files named by the SHA-256 of their key, each with its
+    own time to live. Reading an entry marks it as recently used and the
+    least recently used entries are evicted once the cache exceeds
+    max_bytes.
+
+    Parameters
+    ----------
+    path : str
+        Directory holding the cache entries
+    max_bytes : int
+        Maximum total size of the cache entries
+    """
+
+    def __init__(self, path=BLS_RESPONSE_CACHE_DIR, max_bytes=BLS_CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._size = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(**parts):
+        """Return the content address of a request described by parts"""
+        encoded = json.dumps(parts, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.path, key[:2], f"{key}.json")
+
+    def get(self, key, allow_stale=False):
+        """Return the cached payload for key, or None if missing or expired"""
+        entry_path = self._entry_path(key)
+        try:
+            with open(entry_path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        ttl = entry["ttl"]
+        if not allow_stale and ttl is not None:
+            if time.time() - entry["created"] > ttl:
+                return None
+        try:
+            os.utime(entry_path)
+        except OSError:
+            pass
+        return entry["payload"]
+
+    def put(self, key, payload, ttl=None):
+        """Store payload under key, expiring after ttl seconds (None: never)"""
+        entry_path = self._entry_path(key)
+        os.makedirs(os.path.dirname(entry_path), exist_ok=True)
+        data = json.dumps(
+            {"created": time.time(), "ttl": ttl, "payload": payload}
+        )
+        tmp_path = f"{entry_path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(data)
+        try:
+            old_size = os.path.getsize(entry_path)
+        except OSError:
+            old_size = 0
+        os.replace(tmp_path, entry_path)
+        with self._lock:
+            if self._size is None:
+                self._size = self._scan_size()
+            else:
+                self._size += len(data) - old_size
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _entries(self):
+        entries = []
+        for root, _, files in os.walk(self.path):
+            for name in files:
+                if name.endswith(".json"):
+                    entry_path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(entry_path)
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry_path))
+        return entries
+
+    def _scan_size(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def _evict(self):
+        """Remove least recently used entries down to 90% of max_bytes"""
+        entries = sorted(self._entries())
+        size = sum(x[1] for x in entries)
+        for _, entry_size, entry_path in entries:
+            if size <= 0.9 * self.max_bytes:
+                break
+            try:
+                os.remove(entry_path)
+            except OSError:
+                continue
+            size -= entry_size
+        self._size = size
+
+    def clear(self):
+        """Remove every entry from the cache"""
+        with self._lock:
+            for _, _, entry_path in self._entries():
+                try:
+                    os.remove(entry_path)
+                except OSError:
+                    pass
+            self._size = 0
+
+
+# Shared response cache for the BLS and FRED clients
+BLS_CACHE = ResponseCache()
+
+
+def year_windows(
+    start_year, end_year, revision_years=BLS_REVISION_YEARS, max_years=BLS_MAX_YEARS
+):
+    """Split a year range into historical and revisable "tail" windows
+
+    Windows span at most max_years years, the most the API returns per
+    request. Historical years are sharded from start_year onward, so the
+    older shards keep the same bounds (and cache entries) as years pass.
+
+    Returns
+    -------
+    list of tuple
+        (start_year, end_year, ttl) for each window, most recent first
+    """
+    tail_start = datetime.date.today().year - revision_years + 1
+    windows = []
+    if end_year >= tail_start:
+        first = max(start_year, tail_start)
+        for start in range(first, end_year + 1, max_years):
+            windows.append((start, min(end_year, start + max_years - 1), BLS_TAIL_TTL))
+    if start_year < tail_start:
+        last = min(end_year, tail_start - 1)
+        for start in range(start_year, last + 1, max_years):
+            windows.append((start, min(last, start + max_years - 1), BLS_HISTORY_TTL))
+    return sorted(windows, reverse=True)
+
+
+_thread_local = threading.local()
+
+
+def _get_session():
+    """Return a requests session local to the calling thread"""
+    session = getattr(_thread_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        _thread_local.session = session
+    return session
+
+
+def post_bls_batch(
+    series_ids, registration_key, start_year, end_year, annual=True
+):
+    """POST a single batch of series IDs to the BLS API
+
+    The request latency, bytes sent and received, and series requested are
+    recorded in TELEMETRY.
+
+    Returns
+    -------
+    list of dict
+        The "series" entries of the API response
+    """
+    headers = {"Content-type": "application/json"}
+    payload = {
+        "seriesid": list(series_ids),
+        "startyear": f"{start_year}",
+        "endyear": f"{end_year}",
+    }
+    payload.update({"registrationKey": registration_key})
+    if annual:
+        payload.update({"annualaverage": "true"})
+    payload = json.dumps(payload)
+    with TELEMETRY.timed("bls_request"):
+        response = _get_session().post(BLS_API_URL, data=payload, headers=headers)
+    TELEMETRY.count("api_calls", source="bls")
+    TELEMETRY.count("series_requested", len(series_ids), source="bls")
+    TELEMETRY.count("bytes_out", len(payload), source="bls")
+    TELEMETRY.count("bytes_in", len(response.content), source="bls")
+    response.raise_for_status()
+    return response.json()["Results"]["series"]
+
+
+def stitch_bls_series(pieces):
+    """Join the pieces of series requested over several year windows
+
+    Parameters
+    ----------
+    pieces : iterable of dict
+        Series from API responses, each window newest first
+
+    Returns
+    -------
+    list of dict
+        One series per series ID, in the order they first appear, with
+        one observation per year and period, newest first
+    """
+    series = {}
+    for piece in pieces:
+        data, seen = series.setdefault(piece["seriesID"], ([], set()))
+        for x in piece["data"]:
+            key = (x["year"], x["period"])
+            if key not in seen:
+                seen.add(key)
+                data.append(x)
+    return [{"seriesID": k, "data": data} for k, (data, _) in series.items()]
+
+
+def fetch_bls_requests(
+    registration_key,
+    plan,
+    start_year,
+    end_year,
+    max_workers=BLS_MAX_WORKERS,
+    rate_limiter=BLS_RATE_LIMITER,
+    cache=BLS_CACHE,
+    windows=None,
+):
+    """Issue planned BLS API requests concurrently
+
+    Responses are cached per series and year window. Historical years are
+    cached for BLS_HISTORY_TTL and the revisable tail for BLS_TAIL_TTL, so
+    repeated runs only re-request the most recent years. Expired entries
+    are still used if the API cannot be reached. Ranges longer than
+    BLS_MAX_YEARS are sharded into several windows (see year_windows),
+    requested concurrently with the other batches.
+
+    Parameters
+    ----------
+    registration_key : str
+        BLS API registration key
+    plan : list of tuple
+        (series_ids, annual) for each API request
+    start_year : int
+        Starting year of data to download
+    end_year : int
+        Ending year of data to download
+    max_workers : int
+        Maximum number of concurrent API requests
+    rate_limiter : TokenBucket or None
+        Limiter consulted before each request; None disables limiting
+    cache : ResponseCache or None
+        Response cache; None disables caching
+    windows : list of tuple or None
+        Year windows to request, as returned by year_windows; None for
+        every window of start_year to end_year
+
+    Returns
+    -------
+    list of list of dict
+        Series from each API response, in the same order as the plan
+    """
+    if windows is None:
+        windows = year_windows(start_year, end_year)
+
+    def cache_key(series_id, window, annual):
+        return ResponseCache.key(
+            source="bls",
+            series_id=series_id,
+            start_year=window[0],
+            end_year=window[1],
+            annual=bool(annual),
+        )
+
+    # Look up every series and window, collecting what must be requested
+    pieces = {}
+    missing = []
+    for series_ids, annual in plan:
+        for window in windows:
+            to_fetch = []
+            for series_id in series_ids:
+                payload = None
+                if cache is not None:
+                    payload = cache.get(cache_key(series_id, window, annual))
+                if payload is None:
+                    to_fetch.append(series_id)
+                else:
+                    pieces[(series_id, window, annual)] = payload
+            TELEMETRY.count("cache_hits", len(series_ids) - len(to_fetch), source="bls")
+            if to_fetch:
+                missing.append((to_fetch, annual, window))
+
+    def fetch(request):
+        series_ids, annual, window = request
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+        try:
+            series = post_bls_batch(
+                series_ids, registration_key, window[0], window[1], annual
+            )
+        except requests.RequestException:
+            if cache is None:
+                raise
+            # Fall back to expired entries when working offline
+            stale = [
+                cache.get(cache_key(x, window, annual), allow_stale=True)
+                for x in series_ids
+            ]
+            if any(x is None for x in stale):
+                raise
+            return request, stale
+        if cache is not None:
+            for s in series:
+                cache.put(
+                    cache_key(s["seriesID"], window, annual), s, ttl=window[2]
+                )
+        return request, series
+
+    if missing:
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+            for (_, annual, window), series in pool.map(fetch, missing):
+                for s in series:
+                    pieces[(s["seriesID"], window, annual)] = s
+
+    # Stitch the windows of each series back together, newest first,
+    # keeping one observation per year and period
+    results = []
+    for series_ids, annual in plan:
+        results.append(
+            stitch_bls_series(
+                pieces[(series_id, window, annual)]
+                for series_id in series_ids
+                for window in windows
+                if (series_id, window, annual) in pieces
+            )
+        )
+    return results
+
+
+@dataclass(frozen=True)
+class JoltsSpec:
+    """Specification of a set of JOLTS series to download
+
+    Parameters
+    ----------
+    name : str
+        Name to give to the downloaded series
+    element : str
+        Element of JOLTS Survey to download
+    rate_level : str
+        Rate ("R") or Level ("L")
+    sa : str
+        Seasonally Adjusted ("S") or not ("U")
+    annual : bool
+        If true, include annual estimates
+    geography : str
+        "state" for every state in one industry, or "industry" for
+        every industry in one state
+    industry : str
+        Industry code used when geography is "state"
+    state : str
+        State FIPS code used when geography is "industry"
+    industries : tuple of str or None
+        Industry codes used when geography is "industry"; None for the
+        industries in INDUSTRY_CODES
+    """
+
+    name: str
+    element: str = "QU"
+    rate_level: str = "R"
+    sa: str = "S"
+    annual: bool = True
+    geography: str = "state"
+    industry: str = "000000"
+    state: str = "00"
+    industries: tuple = None
+
+    def series_ids(self, state_codes):
+        """Return the JOLTS series IDs covered by this spec"""
+        if self.geography == "state":
+            return encode_jolts_ids(
+                state=np.array(list(state_codes), dtype=str),
+                element=self.element,
+                rate_level=self.rate_level,
+                sa=self.sa,
+                industry=self.industry,
+            ).tolist()
+        if self.geography == "industry":
+            return encode_jolts_ids(
+                element=self.element,
+                rate_level=self.rate_level,
+                sa=self.sa,
+                industry=np.array(list(self.industries or INDUSTRY_CODES), dtype=str),
+                state=self.state,
+            ).tolist()
+        raise ValueError(f"Unknown geography: {self.geography}")
+
+
+def plan_bls_requests(specs, state_codes, max_series=BLS_MAX_SERIES):
+    """Plan the minimal set of BLS API requests covering several specs
+
+    Series IDs are deduplicated across specs. A series requested with
+    annual averages by any spec is fetched once with annual averages;
+    specs without them drop the annual rows after the fact.
+
+    Parameters
+    ----------
+    specs : list of JoltsSpec
+        Specs to download
+    state_codes : list of str
+        State FIPS codes for specs with geography "state"
+    max_series : int
+        Maximum number of series IDs per API request
+
+    Returns
+    -------
+    list of tuple
+        (series_ids, annual) for each API request
+    """
+    annual_ids = {}
+    monthly_ids = {}
+    for spec in specs:
+        for series_id in spec.series_ids(state_codes):
+            if spec.annual:
+                annual_ids[series_id] = None
+            else:
+                monthly_ids[series_id] = None
+    monthly_ids = [x for x in monthly_ids if x not in annual_ids]
+
+    requests_plan = [(z, True) for z in batch(list(annual_ids), n=max_series)]
+    requests_plan.extend((z, False) for z in batch(monthly_ids, n=max_series))
+    return requests_plan
+
+
+def fetch_jolts_specs(
+    registration_key,
+    specs,
+    start_year=2018,
+    end_year=2022,
+    max_series=BLS_MAX_SERIES,
+    max_workers=BLS_MAX_WORKERS,
+    rate_limiter=BLS_RATE_LIMITER,
+    cache=BLS_CACHE,
+    compact=False,
+):
+    """Download several JOLTS specs with a single planned set of requests
+
+    Parameters
+    ----------
+    registration_key : str
+        BLS API registration key
+    specs : list of JoltsSpec
+        Specs to download
+    start_year : int
+        Starting year of JOLTS data to download
+    end_year : int
+        Ending year of JOLTS data to download
+    max_series : int
+        Maximum number of series IDs per API request
+    max_workers : int
+        Maximum number of concurrent BLS API requests
+    rate_limiter : TokenBucket or None
+        Limiter consulted before each request; None disables limiting
+    cache : ResponseCache or None
+        Response cache; None disables caching
+    compact : bool
+        If true, return frames with the dtypes of compact_jolts_frame
+
+    Returns
+    -------
+    list of pandas.DataFrame
+        One DataFrame per spec, in the same order as specs
+    """
+    fips = get_state_fips_codes()
+    state_codes = list(fips["state_code"])
+    plan = plan_bls_requests(specs, state_codes, max_series=max_series)
+
+    # API Calls to BLS
+    response_series = {}
+    for series in fetch_bls_requests(
+        registration_key,
+        plan,
+        start_year,
+        end_year,
+        max_workers=max_workers,
+        rate_limiter=rate_limiter,
+        cache=cache,
+    ):
+        response_series.update((s["seriesID"], s) for s in series)
+
+    # Fan the responses back out to each spec
+    dfs = []
+    for spec in specs:
+        spec_series = [
+            response_series[x]
+            for x in spec.series_ids(state_codes)
+            if x in response_series
+        ]
+        dfs.append(parse_jolts_spec(spec_series, spec, fips, compact=compact))
+    return dfs
+
+
+def parse_bls_series(response_series):
+    """Parse BLS API series into NumPy columns in a single pass
+
+    Parameters
+    ----------
+    response_series : list of dict
+        The "series" entries of BLS API responses
+
+    Returns
+    -------
+    series_ids : list of str
+        Series ID of each entry of response_series
+    columns : dict of numpy.ndarray
+        One value per observation: "series" (position in series_ids),
+        "year", "month" (13 for annual averages), "value" and "footnote"
+        (position in footnotes)
+    footnotes : list
+        Distinct footnote texts, with NaN for observations without one
+    """
+    n = sum(len(s["data"]) for s in response_series)
+    series_pos = np.empty(n, dtype=np.int32)
+    years = np.empty(n, dtype=np.int64)
+    periods = np.empty(n, dtype=object)
+    values = np.empty(n, dtype=object)
+    footnote_pos = np.empty(n, dtype=np.int32)
+
+    series_ids = []
+    footnote_codes = {}
+    i = 0
+    for k, s in enumerate(response_series):
+        series_ids.append(s["seriesID"])
+        data = s["data"]
+        series_pos[i : i + len(data)] = k
+        for x in data:
+            years[i] = x["year"]
+            periods[i] = x["period"]
+            values[i] = x["value"]
+            notes = x["footnotes"]
+            text = notes[0].get("text", np.nan) if notes else np.nan
+            code = footnote_codes.get(text)
+            if code is None:
+                code = footnote_codes[text] = len(footnote_codes)
+            footnote_pos[i] = code
+            i += 1
+
+    # Periods ("M01" to "M13") take few distinct values, so parse each once
+    period_codes, distinct_periods = pd.factorize(periods)
+    months = np.array([int(x[1:]) for x in distinct_periods], dtype=np.int64)
+    columns = {
+        "series": series_pos,
+        "year": years,
+        "month": months[period_codes] if n else np.empty(0, dtype=np.int64),
+        "value": pd.to_numeric(values, errors="coerce").astype(np.float64),
+        "footnote": footnote_pos,
+    }
+    return series_ids, columns, list(footnote_codes)
+
+
+# Columns holding labels repeated on every row of a JOLTS frame
+LABEL_COLUMNS = (
+    "series",
+    "name",
+    "state",
+    "state_code",
+    "seasonally_adjusted",
+    "seasonal_adjustment",
+    "industry_code",
+    "industry",
+    "footnotes",
+)
+
+
+def _float32_if_lossless(values):
+    """Return values as float32 if each keeps its shortest decimal form"""
+    values = np.asarray(values, dtype=np.float64)
+    narrow = values.astype(np.float32)
+    if np.array_equal(
+        narrow.astype(str).astype(np.float64), values, equal_nan=True
+    ):
+        return narrow
+    return values
+
+
+def compact_jolts_frame(df):
+    """Return a JOLTS frame with memory-compact dtypes
+
+    Label columns become categoricals, year becomes int16, month a nullable
+    Int8 and value float32 when every value keeps its published decimal
+    representation. Use concat_jolts_frames to combine compact frames.
+    """
+    converted = {}
+    for col in LABEL_COLUMNS:
+        if col in df and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            converted[col] = df[col].astype("category")
+    if "year" in df:
+        converted["year"] = df["year"].astype(np.int16)
+    if "month" in df:
+        converted["month"] = df["month"].astype("Int8")
+    if "value" in df and df["value"].dtype != np.float32:
+        converted["value"] = _float32_if_lossless(df["value"])
+    return df.assign(**converted)
+
+
+def concat_jolts_frames(frames):
+    """Concatenate JOLTS frames, keeping categorical columns categorical
+
+    pandas falls back to object dtype when concatenating categoricals with
+    different categories, so the categories are unified first.
+    """
+    frames = list(frames)
+    if not frames:
+        return pd.DataFrame()
+    unified = [{} for _ in frames]
+    for col in frames[0].columns:
+        if all(
+            col in f and isinstance(f[col].dtype, pd.CategoricalDtype)
+            for f in frames
+        ):
+            categories = union_categoricals([f[col] for f in frames]).categories
+            for i, f in enumerate(frames):
+                unified[i][col] = f[col].cat.set_categories(categories)
+    return pd.concat(
+        [f.assign(**u) for f, u in zip(frames, unified)], ignore_index=True
+    )
+
+
+def _label_column(positions, labels, compact=False):
+    """Expand labels to one value per row given each row's label position"""
+    labels = np.asarray(labels, dtype=object)
+    if compact:
+        label_codes, uniques = pd.factorize(labels)
+        return pd.Categorical.from_codes(label_codes[positions], categories=uniques)
+    return labels[positions]
+
+
+def parse_jolts_spec(response_series, spec, fips=None, compact=False):
+    """Build the DataFrame for a JoltsSpec from BLS API series
+
+    Geography labels are looked up once per series rather than per row.
+    fips is required for specs with geography "state". If compact is true
+    the frame uses the dtypes of compact_jolts_frame.
+    """
+    start = time.perf_counter()
+    series_ids, columns, footnotes = parse_bls_series(response_series)
+    df = jolts_frame(series_ids, columns, footnotes, spec, fips, compact=compact)
+    TELEMETRY.observe("parse", time.perf_counter() - start)
+    TELEMETRY.count("rows_parsed", len(df))
+    TELEMETRY.count("series_parsed", len(series_ids))
+    return df
+
+
+def jolts_frame(series_ids, columns, footnotes, spec, fips=None, compact=False):
+    """Build the DataFrame for a JoltsSpec from parsed series columns
+
+    series_ids, columns and footnotes are as returned by parse_bls_series,
+    whatever the source of the observations.
+    """
+    keep = None if spec.annual else columns["month"] != 13
+    if keep is not None:
+        columns = {k: v[keep] for k, v in columns.items()}
+    series_pos = columns["series"]
+    month = columns["month"]
+    annual = month == 13
+    constant = np.zeros(len(month), dtype=np.int32)
+
+    # Dates are the first of the month, with no date for annual averages
+    date = ((columns["year"] - 1970) * 12 + month - 1).astype("datetime64[M]")
+    date = date.astype("datetime64[ns]")
+    date[annual] = np.datetime64("NaT")
+
+    codes = decode_jolts_ids(series_ids, fields=["state", "industry"])
+    state_codes = codes["state"]
+
+    df = pd.DataFrame(
+        {
+            "series": _label_column(series_pos, series_ids, compact),
+            "name": _label_column(constant, [spec.name], compact),
+            "year": columns["year"],
+            "month": np.where(annual, np.nan, month) if annual.any() else month,
+            "date": date,
+        }
+    )
+    # missing footnotes and labels are stored as the string "nan"
+    if spec.geography == "state":
+        fips_map = {x: y for x, y in zip(fips["state_code"], fips["state_text"])}
+        states = [str(fips_map.get(x, np.nan)) for x in state_codes]
+        df["state"] = _label_column(series_pos, states, compact)
+        df["state_code"] = _label_column(series_pos, state_codes, compact)
+        df["seasonally_adjusted"] = _label_column(constant, [spec.sa], compact)
+    else:
+        industry_codes = codes["industry"]
+        industries = [str(industry_label(x)) for x in industry_codes]
+        df["state_code"] = _label_column(series_pos, state_codes, compact)
+        df["seasonally_adjusted"] = _label_column(constant, [spec.sa], compact)
+        df["industry_code"] = _label_column(series_pos, industry_codes, compact)
+        df["industry"] = _label_column(series_pos, industries, compact)
+    df["value"] = columns["value"]
+    df["footnotes"] = _label_column(
+        columns["footnote"], [str(x) for x in footnotes], compact
+    )
+    if compact:
+        df = compact_jolts_frame(df)
+    return df
+
+
+def incremental_start_year(
+    high_water_mark, revision_months=JOLTS_REVISION_MONTHS, default=2003
+):
+    """First year to re-download given the latest date already stored
+
+    Parameters
+    ----------
+    high_water_mark : datetime-like or None
+        Latest date stored in the target table; None if there is no data
+    revision_months : int
+        Number of months before the high-water mark that BLS may revise
+    default : int
+        Year to start from if there is no stored data
+
+    Returns
+    -------
+    int
+        First year overlapping the revision window
+    """
+    if high_water_mark is None or pd.isnull(high_water_mark):
+        return default
+    start = pd.Timestamp(high_water_mark) - pd.DateOffset(months=revision_months)
+    return max(default, start.year)
+
+
 def build_jolts_dataframe(
     registration_key,
     element="QU",
@@ -60,6 +894,8 @@ def build_jolts_dataframe(
     end_year=2022,
     name="Quit Rate (Seasonally Adjusted)",
     annual=True,
+    max_workers=BLS_MAX_WORKERS,
+    compact=False,
 ):
     """Download JOLTS Data from the BLS API
 
@@ -83,6 +919,10 @@ def build_jolts_dataframe(
         Name to give to the downloaded series
     annual : bool
         If true, include annual estimates
+    max_workers : int
+        Maximum number of concurrent BLS API requests
+    compact : bool
+        If true, use the memory-compact dtypes of compact_jolts_frame
 
     Returns
     -------
@@ -90,97 +930,23 @@ def build_jolts_dataframe(
         DataFrame of specified JOLTS series with columns for
         FIPS code, state name, year, date, name, footnotes, series id
     """
-    fips = get_state_fips_codes()
-    codes = [
-        construct_jolts_id(
-            state=x,
-            element=element,
-            rate_level=rate_level,
-            sa=sa,
-            industry=industry,
-        )
-        for x in fips["state_code"]
-    ]
-    codes_iter = batch(codes, n=20)
-    # API Call to BLS
-    response_series = []
-    for z in codes_iter:
-        headers = {"Content-type": "application/json"}
-        payload = {
-            "seriesid": z,
-            "startyear": f"{start_year}",
-            "endyear": f"{end_year}",
-        }
-        payload.update({"registrationKey": registration_key})
-        if annual:
-            payload.update({"annualaverage": "true"})
-        payload = json.dumps(payload)
-        response = requests.post(
-            "https://api.bls.gov/publicAPI/v2/timeseries/data/",
-            data=payload,
-            headers=headers,
-        )
-        response.raise_for_status()
-        response_series.extend(response.json()["Results"]["series"])
-
-    # Parse Response into DataFrame
-    dfs = []
-    # Build a pandas series from the API results, bls_series
-    for s in response_series:
-        series_id = s["seriesID"]
-        data = s["data"]
-        data = pd.DataFrame(data)
-        data["series"] = series_id
-        dfs.append(data)
-    df_full = pd.concat(dfs)
-
-    # parse dates
-    df_full["month"] = df_full["period"].str.extract("M(\d+)").astype(int)
-    df_full.loc[df_full["period"] == "M13", "month"] = 1
-    df_full["date"] = pd.to_datetime(df_full[["year", "month"]].assign(day=1))
-    df_full["name"] = name
-    df_full["footnotes"] = df_full["footnotes"].apply(
-        lambda x: x[0].setdefault("text", np.nan)
-    )
-    df_full["seasonally_adjusted"] = sa
-    # df_full['footnotes'] = df_full['footnotes'].apply(lambda x: x[0]['text'])
-    df_full.loc[df_full["period"] == "M13", "date"] = None
-    # parse geography
-    df_full["state_code"] = df_full["series"].str.slice(start=9, stop=11)
-    fips_map = {x: y for x, y in zip(fips["state_code"], fips["state_text"])}
-    df_full["state"] = df_full["state_code"].map(fips_map)
-
-    # Specify Types
-    df_full = df_full.astype(
-        {
-            "series": "str",
-            "state_code": "str",
-            "state": "str",
-            "year": "int",
-            "date": "datetime64[D]",
-            "name": "str",
-            "footnotes": "str",
-            "seasonally_adjusted": "str",
-            "value": "float",
-        }
+    spec = JoltsSpec(
+        name=name,
+        element=element,
+        rate_level=rate_level,
+        sa=sa,
+        annual=annual,
+        geography="state",
+        industry=industry,
     )
-    df_full["month"] = df_full["date"].dt.month
-
-    return df_full.loc[
-        :,
-        [
-            "series",
-            "name",
-            "year",
-            "month",
-            "date",
-            "state",
-            "state_code",
-            "seasonally_adjusted",
-            "value",
-            "footnotes",
-        ],
-    ]
+    return fetch_jolts_specs(
+        registration_key,
+        [spec],
+        start_year=start_year,
+        end_year=end_year,
+        max_workers=max_workers,
+        compact=compact,
+    )[0]
 
 
 def jolts_national_by_industry(
@@ -193,159 +959,59 @@ def jolts_national_by_industry(
     start_year=2018,
     end_year=2022,
     annual=True,
+    max_workers=BLS_MAX_WORKERS,
+    compact=False,
+    industries=None,
     ):
-    """Download national JOLTS data by industry"""
-
-    industry_codes = {"110000": "Agriculture, Forestry, Fishing and Hunting",
-                      "210000": "Mining, Quarrying, and Oil and Gas Extraction",
-                        "220000": "Utilities",
-                        "230000": "Construction",
-                        "310000": "Manufacturing",
-                        "320000": "Manufacturing",
-                        "330000": "Manufacturing",
-                        "420000": "Wholesale Trade",
-                        "440000": "Retail Trade",
-                        "450000": "Retail Trade",
-                        "480000": "Transportation and Warehousing",
-                        "490000": "Transportation and Warehousing",
-                        "510000": "Information",
-                        "520000": "Finance and Insurance",
-                        "530000": "Real Estate and Rental and Leasing",
-                        "540000": "Professional, Scientific, and Technical Services",
-                        "550000": "Management of Companies and Enterprises",
-                        "560000": "Administrative and Support and Waste Management and Remediation Services",
-                        "610000": "Educational Services",
-                        "620000": "Health Care and Social Assistance",
-                        "710000": "Arts, Entertainment, and Recreation",
-                        "720000": "Accommodation and Food Services",
-                        "810000": "Other Services (except Public Administration)",
-                        "820000": "Public Administration",
-                        }
-
-
-    code_list = industry_codes.keys()
-
-    codes = [
-        construct_jolts_id(
-            element=element,
-            rate_level=rate_level,
-            sa=sa,
-            industry=c,
-            state=fips,
-        )
-        for c in code_list
-    ]
-
-    codes_iter = batch(codes, n=20)
-    # API Call to BLS
-    response_series = []
-    for z in codes_iter:
-        headers = {"Content-type": "application/json"}
-        payload = {
-            "seriesid": z,
-            "startyear": f"{start_year}",
-            "endyear": f"{end_year}",
-        }
-        payload.update({"registrationKey": registration_key})
-        if annual:
-            payload.update({"annualaverage": "true"})
-        payload = json.dumps(payload)
-        response = requests.post(
-            "https://api.bls.gov/publicAPI/v2/timeseries/data/",
-            data=payload,
-            headers=headers,
-        )
-        response.raise_for_status()
-        response_series.extend(response.json()["Results"]["series"])
+    """Download national JOLTS data by industry
 
-    # Parse Response into DataFrame
-    dfs = []
-    # Build a pandas series from the API results, bls_series
-    for s in response_series:
-        series_id = s["seriesID"]
-        data = s["data"]
-        data = pd.DataFrame(data)
-        data["series"] = series_id
-        dfs.append(data)
-    df_full = pd.concat(dfs)
-
-    # parse dates
-    df_full["month"] = df_full["period"].str.extract("M(\d+)").astype(int)
-    df_full.loc[df_full["period"] == "M13", "month"] = 1
-    df_full["date"] = pd.to_datetime(df_full[["year", "month"]].assign(day=1))
-    df_full["name"] = name
-    df_full["footnotes"] = df_full["footnotes"].apply(
-        lambda x: x[0].setdefault("text", np.nan)
+    industries is an optional list of industry codes to download instead
+    of those in INDUSTRY_CODES.
+    """
+    spec = JoltsSpec(
+        name=name,
+        element=element,
+        rate_level=rate_level,
+        sa=sa,
+        annual=annual,
+        geography="industry",
+        state=fips,
+        industries=tuple(industries) if industries is not None else None,
     )
-    df_full["seasonally_adjusted"] = sa
-    # df_full['footnotes'] = df_full['footnotes'].apply(lambda x: x[0]['text'])
-    df_full.loc[df_full["period"] == "M13", "date"] = None
-    # parse geography
-    df_full["state_code"] = df_full["series"].str.slice(start=9, stop=11)
+    return fetch_jolts_specs(
+        registration_key,
+        [spec],
+        start_year=start_year,
+        end_year=end_year,
+        max_workers=max_workers,
+        compact=compact,
+    )[0]
 
-    # extract industry
-    df_full["industry_code"] = df_full["series"].str.slice(start=3, stop=9)
-    df_full["industry"] = df_full["industry_code"].map(industry_codes)
 
+def get_recessions_fred(
+    api_key, start_date="2003-01-01", end_date="2022-01-11", path=FRED_CACHE_DIR
+):
+    """Get recessions indicators from St. Louis FRED API
 
-    # Specify Types
-    df_full = df_full.astype(
-        {
-            "series": "str",
-            "state_code": "str",
-            "year": "int",
-            "date": "datetime64[D]",
-            "name": "str",
-            "footnotes": "str",
-            "seasonally_adjusted": "str",
-            "industry_code": "str",
-            "industry": "str",
-            "value": "float",
-        }
+    Observations are stored locally and only new ones are requested (see
+    fred.fred_observations).
+    """
+    return fred_observations(
+        api_key, "USRECM", start_date=start_date, end_date=end_date, path=path
     )
-    df_full["month"] = df_full["date"].dt.month
-
-    return df_full.loc[
-        :,
-        [
-            "series",
-            "name",
-            "year",
-            "month",
-            "date",
-            "state_code",
-            "seasonally_adjusted",
-            "industry_code",
-            "industry",
-            "value",
-            "footnotes",
-        ],
-    ]
 
 
-def get_recessions_fred(
-    api_key, start_date="2003-01-01", end_date="2022-01-11"
-):
-    """Get recessions indicators from St. Louis FRED API"""
-    url = "https://api.stlouisfed.org/fred/series/observations"
-    payload = {
-        "series_id": "USRECM",
-        "api_key": api_key,
-        "file_type": "json",
-        "observation_start": start_date,
-        "observation_end": end_date,
-    }
-    response = requests.get(url, params=payload)
-    return pd.read_json(json.dumps(response.json()["observations"])).loc[
-        :, ["date", "value"]
+def monthly_national_filters(sa="S"):
+    """Return the filters selecting the national monthly estimates of a table
+
+    Use with load_dataset or download_dataset to only load these rows.
+    """
+    return [
+        ("date", "not null", None),
+        ("state", "==", "Total US"),
+        ("seasonally_adjusted", "==", sa),
     ]
 
 
 def monthly_national_sub(bls_series, sa="S"):
-    monthly = bls_series[bls_series.date.notnull()]
-    monthly_national = monthly.loc[
-        (monthly["state"] == "Total US")
-        & (monthly["seasonally_adjusted"] == sa),
-        :,
-    ]
-    return monthly_national
+    return apply_filters(bls_series, monthly_national_filters(sa))
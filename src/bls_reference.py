@@ -0,0 +1,142 @@
+import json
+import os
+import threading
+import time
+from functools import lru_cache
+from io import StringIO
+
+import pandas as pd
+import requests
+
+BLS_REFERENCE_URL = "https://download.bls.gov/pub/time.series/jt/"
+# Root directory for on-disk caches of BLS data
+BLS_CACHE_DIR = os.environ.get(
+    "BLS_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "bls_notebook")
+)
+REFERENCE_DIR = os.path.join(BLS_CACHE_DIR, "reference")
+# Seconds a disk copy is used before it is revalidated with the server
+REFERENCE_TTL = 24 * 60 * 60
+# Bytes written to disk at a time when downloading a file
+DOWNLOAD_CHUNK_BYTES = 1024 * 1024
+
+
+def _read_metadata(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+_file_locks = {}
+_file_locks_lock = threading.Lock()
+
+
+def _file_lock(local_path):
+    with _file_locks_lock:
+        return _file_locks.setdefault(local_path, threading.Lock())
+
+
+def download_reference_file(filename, path=REFERENCE_DIR, ttl=REFERENCE_TTL):
+    """Return the local path of a file from the BLS JT directory
+
+    The file is kept on disk and only downloaded again if the server
+    reports a change (ETag / Last-Modified), checked at most every ttl
+    seconds. The disk copy is used if the server cannot be reached. Files
+    are streamed to disk, so large data files are never held in memory.
+    Concurrent calls for the same file download it once; each writer uses
+    its own temporary file, so other processes never see a partial copy.
+
+    Parameters
+    ----------
+    filename : str
+        Name of the file, e.g. "jt.state"
+    path : str
+        Directory holding the local copies
+    ttl : int
+        Seconds before a local copy is revalidated
+
+    Returns
+    -------
+    str
+        Path of the local copy
+    """
+    local_path = os.path.join(path, filename)
+    with _file_lock(local_path):
+        return _download(filename, local_path, path, ttl)
+
+
+def _download(filename, local_path, path, ttl):
+    meta_path = f"{local_path}.json"
+    meta = _read_metadata(meta_path)
+    if os.path.exists(local_path) and time.time() - meta.get("checked", 0) < ttl:
+        return local_path
+
+    headers = {}
+    if os.path.exists(local_path):
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+    try:
+        response = requests.get(
+            BLS_REFERENCE_URL + filename, headers=headers, stream=True
+        )
+        response.raise_for_status()
+        os.makedirs(path, exist_ok=True)
+        if response.status_code != 304:
+            tmp_path = f"{local_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                with open(tmp_path, "wb") as f:
+                    for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_BYTES):
+                        f.write(chunk)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+    except requests.RequestException:
+        if os.path.exists(local_path):
+            return local_path
+        raise
+
+    if response.status_code != 304:
+        os.replace(tmp_path, local_path)
+        meta = {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+        }
+    meta["checked"] = time.time()
+    tmp_meta_path = f"{meta_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_meta_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(tmp_meta_path, meta_path)
+    return local_path
+
+
+@lru_cache(maxsize=None)
+def reference_table(name):
+    """Return a JOLTS reference table (e.g. "state", "industry") as a DataFrame
+
+    Tables are loaded once per process from the revalidated disk copy of
+    jt.{name}. All columns are strings.
+    """
+    local_path = download_reference_file(f"jt.{name}")
+    with open(local_path, "r", encoding="utf-8") as f:
+        text = f.read()
+    df = pd.read_csv(StringIO(text), sep="\t", dtype=str, keep_default_na=False)
+    df.columns = [c.strip() for c in df.columns]
+    return df.apply(lambda x: x.str.strip())
+
+
+@lru_cache(maxsize=None)
+def reference_labels(name):
+    """Return a dict mapping the codes of a reference table to their labels
+
+    Parameters
+    ----------
+    name : str
+        Reference table name, such as "state", "industry", "sizeclass",
+        "dataelement", "ratelevel", "area", "seasonal" or "footnote"
+    """
+    df = reference_table(name)
+    return dict(zip(df[f"{name}_code"], df[f"{name}_text"]))
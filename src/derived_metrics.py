@@ -0,0 +1,146 @@
+import datetime
+
+from upload_download_bitdotio import get_engine
+
+
+def metrics_table_names(upload_table):
+    """Return the names of the derived tables of a table
+
+    Returns
+    -------
+    tuple
+        Monthly metrics table ({table}_metrics) and annual averages table
+        ({table}_annual)
+    """
+    return f"{upload_table}_metrics", f"{upload_table}_annual"
+
+
+def refresh_derived_metrics(
+    upload_schema, upload_table, bitio_pg_string, since_date=None
+):
+    """Maintain the derived metrics tables of an uploaded table
+
+    {table}_metrics holds, for each series and month, the value, its
+    change from 12 months before (absolute and in percent), and its 3 and
+    12 month rolling averages. {table}_annual holds the average of the
+    monthly values of each series and year, with the number of months
+    averaged. Both are keyed (and indexed) by series and date or year.
+
+    Only rows from since_date onward are recomputed, reading the 12 months
+    before it for the rolling windows, so incremental loads only refresh
+    the re-downloaded range. With since_date None every row is recomputed.
+    The derived tables are created if they do not exist.
+
+    Parameters
+    ----------
+    upload_schema : str
+        Schema (bit.io repository) of the table
+    upload_table : str
+        Name of the table holding the raw series
+    bitio_pg_string : str
+        PostgreSQL connection string
+    since_date : datetime.date or None
+        First month to recompute
+
+    Returns
+    -------
+    dict
+        Number of "metrics" and "annual" rows written
+    """
+    engine = get_engine(bitio_pg_string)
+    metrics_table, annual_table = metrics_table_names(upload_table)
+    raw = f'"{upload_schema}"."{upload_table}"'
+    metrics = f'"{upload_schema}"."{metrics_table}"'
+    annual = f'"{upload_schema}"."{annual_table}"'
+    params = {"since": None, "lookback": None, "since_year": None}
+    if since_date is not None:
+        since = datetime.datetime(since_date.year, since_date.month, 1)
+        params = {
+            "since": since,
+            "lookback": since.replace(year=since.year - 1),
+            "since_year": since.year,
+        }
+
+    with engine.begin() as conn:
+        conn.execute(
+            f'CREATE INDEX IF NOT EXISTS "{upload_table}_series_date" '
+            f'ON {raw} ("series", "date")'
+        )
+        conn.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {metrics} (
+                "series" TEXT NOT NULL,
+                "date" TIMESTAMP NOT NULL,
+                "value" DOUBLE PRECISION,
+                "yoy_change" DOUBLE PRECISION,
+                "yoy_pct_change" DOUBLE PRECISION,
+                "avg_3m" DOUBLE PRECISION,
+                "avg_12m" DOUBLE PRECISION,
+                PRIMARY KEY ("series", "date")
+            )
+            """
+        )
+        conn.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {annual} (
+                "series" TEXT NOT NULL,
+                "year" INTEGER NOT NULL,
+                "avg_value" DOUBLE PRECISION,
+                "months" INTEGER,
+                PRIMARY KEY ("series", "year")
+            )
+            """
+        )
+
+        conn.execute(
+            f'DELETE FROM {metrics} WHERE %(since)s IS NULL OR "date" >= %(since)s',
+            params,
+        )
+        # windows are ranges of dates, so missing months are not averaged
+        # over neighboring ones
+        metrics_rows = conn.execute(
+            f"""
+            INSERT INTO {metrics}
+            SELECT * FROM (
+                SELECT
+                    r."series",
+                    r."date",
+                    r."value",
+                    r."value" - p."value" AS yoy_change,
+                    100 * (r."value" - p."value") / NULLIF(p."value", 0) AS yoy_pct_change,
+                    avg(r."value") OVER w3 AS avg_3m,
+                    avg(r."value") OVER w12 AS avg_12m
+                FROM {raw} AS r
+                LEFT JOIN {raw} AS p
+                    ON p."series" = r."series"
+                    AND p."date" = r."date" - INTERVAL '12 months'
+                WHERE r."date" IS NOT NULL
+                    AND (%(lookback)s IS NULL OR r."date" >= %(lookback)s)
+                WINDOW
+                    w3 AS (PARTITION BY r."series" ORDER BY r."date"
+                        RANGE BETWEEN INTERVAL '2 months' PRECEDING AND CURRENT ROW),
+                    w12 AS (PARTITION BY r."series" ORDER BY r."date"
+                        RANGE BETWEEN INTERVAL '11 months' PRECEDING AND CURRENT ROW)
+            ) AS m
+            WHERE %(since)s IS NULL OR m."date" >= %(since)s
+            """,
+            params,
+        ).rowcount
+
+        conn.execute(
+            f'DELETE FROM {annual} WHERE %(since_year)s IS NULL OR "year" >= %(since_year)s',
+            params,
+        )
+        annual_rows = conn.execute(
+            f"""
+            INSERT INTO {annual}
+            SELECT "series", "year", avg("value"), count(*)
+            FROM {raw}
+            WHERE "date" IS NOT NULL
+                AND (%(since_year)s IS NULL OR "year" >= %(since_year)s)
+            GROUP BY "series", "year"
+            """,
+            params,
+        ).rowcount
+
+    return {"metrics": metrics_rows, "annual": annual_rows}
@@ -0,0 +1,130 @@
+import operator
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+# Row filters are lists of (column, op, value) conditions that rows must all
+# meet. op is one of "==", "!=", "<", "<=", ">", ">=", "in", "not in",
+# "is null" or "not null" (value is ignored for the last two). The same
+# filters can be applied to a DataFrame, a snapshot or a SQL query, and
+# select the same rows in each: as in SQL, null values never meet a
+# comparison, including "!=" and "not in".
+FILTER_OPS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+_SQL_OPS = {"==": "=", "!=": "<>", "<": "<", "<=": "<=", ">": ">", ">=": ">="}
+
+
+def _check_op(op):
+    if op not in FILTER_OPS and op not in ("in", "not in", "is null", "not null"):
+        raise ValueError(f"Unknown filter operator: {op}")
+
+
+def apply_filters(df, filters):
+    """Return the rows of df meeting every filter"""
+    mask = np.ones(len(df), dtype=bool)
+    for column, op, value in filters or ():
+        _check_op(op)
+        values = df[column]
+        if op == "in":
+            condition = values.isin(list(value))
+        elif op == "not in":
+            condition = values.notna() & ~values.isin(list(value))
+        elif op == "is null":
+            condition = values.isnull()
+        elif op == "not null":
+            condition = values.notnull()
+        elif op == "!=":
+            condition = values.notna() & (values != value)
+        else:
+            condition = FILTER_OPS[op](values, value)
+        mask &= np.asarray(condition, dtype=bool)
+    return df[mask]
+
+
+def arrow_expression(filters, schema=None):
+    """Compile filters into a pyarrow.dataset expression
+
+    If schema is given, values compared to timestamp columns are converted
+    to timestamps, so dates may be given as strings.
+    """
+    expression = None
+    for column, op, value in filters or ():
+        _check_op(op)
+        if (
+            schema is not None
+            and column in schema.names
+            and pa.types.is_timestamp(schema.field(column).type)
+            and op not in ("is null", "not null")
+        ):
+            if op in ("in", "not in"):
+                value = [pd.Timestamp(x) for x in value]
+            else:
+                value = pd.Timestamp(value)
+        field = ds.field(column)
+        if op == "in":
+            condition = field.isin(list(value))
+        elif op == "not in":
+            condition = field.is_valid() & ~field.isin(list(value))
+        elif op == "is null":
+            condition = field.is_null()
+        elif op == "not null":
+            condition = field.is_valid()
+        else:
+            condition = FILTER_OPS[op](field, value)
+        expression = condition if expression is None else expression & condition
+    return expression
+
+
+def _sql_value(value):
+    # psycopg2 does not adapt numpy scalars
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def sql_where(filters, paramstyle="named"):
+    """Compile filters into a SQL WHERE clause with bound parameters
+
+    Parameters
+    ----------
+    filters : list of tuple or None
+        (column, op, value) conditions
+    paramstyle : str
+        "named" (:name) for sqlalchemy.text, or "pyformat" (%(name)s) for
+        psycopg2 cursors
+
+    Returns
+    -------
+    tuple
+        The clause (empty if there are no filters) and the dict of its
+        parameters
+    """
+    if paramstyle not in ("named", "pyformat"):
+        raise ValueError(f"Unknown paramstyle: {paramstyle}")
+    clauses = []
+    params = {}
+    for i, (column, op, value) in enumerate(filters or ()):
+        _check_op(op)
+        name = '"{}"'.format(column.replace('"', '""'))
+        param = f"p{i}"
+        placeholder = f":{param}" if paramstyle == "named" else f"%({param})s"
+        if op in ("in", "not in"):
+            clause = f"{name} = ANY({placeholder})"
+            clauses.append(clause if op == "in" else f"NOT ({clause})")
+            params[param] = [_sql_value(x) for x in value]
+        elif op == "is null":
+            clauses.append(f"{name} IS NULL")
+        elif op == "not null":
+            clauses.append(f"{name} IS NOT NULL")
+        else:
+            clauses.append(f"{name} {_SQL_OPS[op]} {placeholder}")
+            params[param] = _sql_value(value)
+    if not clauses:
+        return "", params
+    return " WHERE " + " AND ".join(clauses), params
@@ -0,0 +1,190 @@
+import json
+import os
+import threading
+import time
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from bls_reference import BLS_CACHE_DIR
+from telemetry import TELEMETRY
+
+FRED_API_URL = "https://api.stlouisfed.org/fred/series/observations"
+# Directory holding the locally stored FRED series
+FRED_CACHE_DIR = os.path.join(BLS_CACHE_DIR, "fred")
+# Seconds before a stored series is checked for new observations
+FRED_TTL = 12 * 60 * 60
+# Retries of failed or throttled FRED requests, with exponential backoff
+FRED_RETRY = Retry(
+    total=3,
+    backoff_factor=0.5,
+    status_forcelist=(429, 500, 502, 503, 504),
+    allowed_methods=("GET",),
+)
+
+_store_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def _get_session():
+    """Return the session used for FRED requests, retrying failed requests"""
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(max_retries=FRED_RETRY))
+    return session
+
+
+def _read_store(store_path):
+    try:
+        with open(store_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_store(store_path, store):
+    os.makedirs(os.path.dirname(store_path), exist_ok=True)
+    tmp_path = f"{store_path}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(store, f)
+    os.replace(tmp_path, store_path)
+
+
+def _request_observations(api_key, series_id, start_date, end_date):
+    payload = {
+        "series_id": series_id,
+        "api_key": api_key,
+        "file_type": "json",
+        "observation_start": start_date,
+        "observation_end": end_date,
+    }
+    with TELEMETRY.timed("fred_request"):
+        response = _get_session().get(FRED_API_URL, params=payload)
+    TELEMETRY.count("api_calls", source="fred")
+    TELEMETRY.count("bytes_in", len(response.content), source="fred")
+    response.raise_for_status()
+    return [[x["date"], x["value"]] for x in response.json()["observations"]]
+
+
+def parse_observations(observations):
+    """Build a DataFrame of dates and values from [date, value] pairs
+
+    Missing values (".") become NaN.
+    """
+    if not observations:
+        return pd.DataFrame(
+            {"date": pd.Series(dtype="datetime64[ns]"), "value": pd.Series(dtype="float64")}
+        )
+    dates, values = zip(*observations)
+    return pd.DataFrame(
+        {
+            "date": pd.to_datetime(np.array(dates), format="%Y-%m-%d"),
+            "value": pd.to_numeric(pd.Series(values), errors="coerce"),
+        }
+    )
+
+
+def fred_observations(
+    api_key,
+    series_id,
+    start_date="2003-01-01",
+    end_date=None,
+    path=FRED_CACHE_DIR,
+    ttl=FRED_TTL,
+):
+    """Return the observations of a FRED series between two dates
+
+    Observations are stored locally. Later calls only request observations
+    from the last stored date onward, at most every ttl seconds, and use
+    the stored observations if FRED cannot be reached.
+
+    Parameters
+    ----------
+    api_key : str
+        FRED API key
+    series_id : str
+        FRED series ID, e.g. "USRECM"
+    start_date : str
+        First date, as YYYY-MM-DD
+    end_date : str or None
+        Last date, as YYYY-MM-DD; None for today
+    path : str
+        Directory holding the stored series
+    ttl : int
+        Seconds before the stored series is checked for new observations
+
+    Returns
+    -------
+    pandas.DataFrame
+        "date" and "value" of each observation
+    """
+    if end_date is None:
+        end_date = pd.Timestamp("today").strftime("%Y-%m-%d")
+    store_path = os.path.join(path, f"{series_id}.json")
+
+    with _store_lock:
+        store = _read_store(store_path)
+        if store is not None and store["start"] > start_date:
+            # the stored series starts too late to be extended
+            store = None
+        observations = store["observations"] if store is not None else []
+        last_date = observations[-1][0] if observations else None
+        fresh = store is not None and time.time() - store["checked"] < ttl
+        if not fresh and (last_date is None or last_date < end_date):
+            try:
+                # the last stored observation is requested again as it
+                # may have been revised
+                new = _request_observations(
+                    api_key, series_id, last_date or start_date, end_date
+                )
+            except requests.RequestException:
+                if store is None:
+                    raise
+            else:
+                if last_date is not None:
+                    observations = [x for x in observations if x[0] < last_date]
+                observations.extend(new)
+                store = {
+                    "start": store["start"] if store is not None else start_date,
+                    "checked": time.time(),
+                    "observations": observations,
+                }
+                _write_store(store_path, store)
+
+    selected = [x for x in observations if start_date <= x[0] <= end_date]
+    return parse_observations(selected)
+
+
+def recession_intervals(recessions):
+    """Return the start and end dates of the recessions in a 0/1 series
+
+    Parameters
+    ----------
+    recessions : pandas.DataFrame
+        Monthly "date" and "value" indicator, 1 during recessions
+
+    Returns
+    -------
+    pandas.DataFrame
+        "start" (first month of a recession) and "end" (first month after
+        it) of each recession
+    """
+    flags = recessions["value"].to_numpy() == 1
+    dates = recessions["date"].to_numpy()
+    edges = np.diff(np.concatenate([[False], flags, [False]]).astype(np.int8))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    # a recession still ongoing ends after the last observation
+    end_dates = [
+        dates[i] if i < len(dates) else pd.Timestamp(dates[-1]) + pd.DateOffset(months=1)
+        for i in ends
+    ]
+    return pd.DataFrame(
+        {
+            "start": pd.to_datetime(dates[starts]),
+            "end": pd.to_datetime(end_dates),
+        }
+    )
@@ -0,0 +1,138 @@
+import numpy as np
+
+# Fields of a JOLTS series ID, in order, with their widths, e.g.
+# JT S 000000 00 00000 00 QU R
+JOLTS_ID_FIELDS = (
+    ("prefix", 2),
+    ("sa", 1),
+    ("industry", 6),
+    ("state", 2),
+    ("area", 5),
+    ("size_class", 2),
+    ("element", 2),
+    ("rate_level", 1),
+)
+JOLTS_ID_WIDTH = sum(width for _, width in JOLTS_ID_FIELDS)
+
+
+def _field_offsets():
+    offsets = {}
+    start = 0
+    for name, width in JOLTS_ID_FIELDS:
+        offsets[name] = (start, start + width)
+        start += width
+    return offsets
+
+
+# (start, stop) character positions of each field
+JOLTS_ID_OFFSETS = _field_offsets()
+
+
+def _char_codes(values, width, name):
+    """Return the characters of fixed-width codes as a uint8 array
+
+    values is read in place as an array of character codes, without
+    converting each string. Codes may be padded with trailing spaces, but
+    must otherwise have exactly width ASCII characters.
+
+    Returns
+    -------
+    numpy.ndarray
+        Array of shape values.shape + (width,)
+    """
+    if isinstance(values, str) and values.isascii() and len(values.rstrip(" ")) == width:
+        # single codes, such as the defaults of encode_jolts_ids
+        chars = np.frombuffer(values[:width].encode("ascii"), np.uint8)
+        if ((chars > 32) & (chars < 128)).all():
+            return chars
+    values = np.asarray(values)
+    if values.dtype.kind not in ("U", "S"):
+        values = values.astype(str)
+    shape = values.shape
+    # characters are 4-byte code points in "U" arrays and bytes in "S" arrays
+    char_type = np.uint32 if values.dtype.kind == "U" else np.uint8
+    length = values.dtype.itemsize // np.dtype(char_type).itemsize
+    chars = np.ascontiguousarray(values).reshape(-1, 1).view(char_type)
+    chars = chars.reshape(-1, length)
+    if length < width:
+        chars = np.pad(chars, ((0, 0), (0, width - length)))
+    head = chars[:, :width]
+    tail = chars[:, width:]
+    valid = ((head > 32) & (head < 128)).all(axis=1)
+    valid &= ((tail == 0) | (tail == 32)).all(axis=1)
+    if not valid.all():
+        bad = values.reshape(-1)[np.argmin(valid)]
+        raise ValueError(f"JOLTS {name} must be {width} characters, got {bad!r}")
+    return head.astype(np.uint8).reshape(shape + (width,))
+
+
+def encode_jolts_ids(
+    prefix="JT",
+    sa="S",
+    industry="000000",
+    state="00",
+    area="00000",
+    size_class="00",
+    element="QU",
+    rate_level="R",
+):
+    """Build JOLTS series IDs from arrays of dimension codes
+
+    Each argument is a code or an array of codes; arrays are broadcast
+    against each other, and the IDs are assembled in a single fixed-width
+    byte array rather than by concatenating strings one ID at a time.
+
+    Returns
+    -------
+    numpy.ndarray
+        Series IDs (str), with the broadcast shape of the arguments
+    """
+    codes = {
+        "prefix": prefix,
+        "sa": sa,
+        "industry": industry,
+        "state": state,
+        "area": area,
+        "size_class": size_class,
+        "element": element,
+        "rate_level": rate_level,
+    }
+    fields = {
+        name: _char_codes(codes[name], width, name) for name, width in JOLTS_ID_FIELDS
+    }
+    shape = np.broadcast_shapes(*(x.shape[:-1] for x in fields.values()))
+    ids = np.empty(shape + (JOLTS_ID_WIDTH,), dtype=np.uint8)
+    for name, width in JOLTS_ID_FIELDS:
+        start, stop = JOLTS_ID_OFFSETS[name]
+        ids[..., start:stop] = np.broadcast_to(fields[name], shape + (width,))
+    return ids.view(f"S{JOLTS_ID_WIDTH}")[..., 0].astype(str)
+
+
+def decode_jolts_ids(series_ids, fields=None):
+    """Split JOLTS series IDs into their dimension codes
+
+    IDs are read as one fixed-width byte array, and each field is a slice
+    of its columns. Trailing padding, as in the BLS flat files, is
+    ignored.
+
+    Parameters
+    ----------
+    series_ids : array-like of str or bytes
+        JOLTS series IDs
+    fields : list of str or None
+        Fields to decode (see JOLTS_ID_FIELDS); None for every field
+
+    Returns
+    -------
+    dict of numpy.ndarray
+        Codes (str) of each field, one per series ID
+    """
+    ids = _char_codes(series_ids, JOLTS_ID_WIDTH, "series IDs")
+    ids = ids.reshape(-1, JOLTS_ID_WIDTH)
+    names = [name for name, _ in JOLTS_ID_FIELDS] if fields is None else fields
+    columns = {}
+    for name in names:
+        start, stop = JOLTS_ID_OFFSETS[name]
+        codes = np.ascontiguousarray(ids[:, start:stop]).view(f"S{stop - start}")
+        columns[name] = codes[:, 0].astype(str)
+    return columns
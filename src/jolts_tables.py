@@ -0,0 +1,22 @@
+from pipeline import TableSpec
+
+# Tables loaded by main.py. Adding a table only takes a new entry here.
+TABLES = [
+    TableSpec("quit_rate", "Quit Rate", "QU", "R"),
+    TableSpec("layoffs_discharges_rate", "Layoffs and Discharges Rate", "LD", "R", annual=False),
+    TableSpec("job_openings_rate", "Job Openings", "JO", "R", annual=False),
+    TableSpec("hire_rate", "Hire Rate", "HI", "R"),
+    TableSpec("industry_quit_rate", "Quit Rate by Industry", "QU", "R", "industry"),
+    TableSpec("industry_ld_rate", "Layoffs and Discharges by Industry", "LD", "R", "industry"),
+    TableSpec("industry_openings_rate", "Job Openings by Industry", "JO", "R", "industry"),
+    TableSpec("quit_level", "Quit Level", "QU", "L"),
+    TableSpec("hire_level", "Hire Level", "HI", "L"),
+    TableSpec("separation_rate", "Total Separation Rate", "TS", "R"),
+    TableSpec("separation_level", "Total Separation Level", "TS", "L"),
+    TableSpec("industry_separation_rate", "Job Separation Rate by Industry", "TS", "R", "industry"),
+    TableSpec("industry_separation_level", "Job Separation Level by Industry", "TS", "L", "industry"),
+    TableSpec("industry_hire_rate", "Hire Rate by Industry", "HI", "R", "industry"),
+    TableSpec("industry_hire_level", "Hire Level by Industry", "HI", "L", "industry"),
+    TableSpec("industry_quit_level", "Quit Level by Industry", "QU", "L", "industry"),
+    TableSpec("layoffs_discharges_level", "Layoffs and Discharges Level", "LD", "L"),
+]
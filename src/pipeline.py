@@ -0,0 +1,812 @@
+import datetime
+import os
+import queue
+import threading
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from functools import partial
+
+from bls_flatfile import flatfile_name, parse_flatfile_spec, read_flatfile
+from bls_query import (
+    BLS_MAX_SERIES,
+    BLS_MAX_WORKERS,
+    JoltsSpec,
+    compact_jolts_frame,
+    concat_jolts_frames,
+    fetch_bls_requests,
+    get_state_fips_codes,
+    incremental_start_year,
+    parse_jolts_spec,
+    plan_bls_requests,
+    stitch_bls_series,
+    year_windows,
+)
+from derived_metrics import refresh_derived_metrics
+from telemetry import TELEMETRY
+from upload_download_bitdotio import (
+    SNAPSHOT_DIR,
+    UPLOAD_MAX_WORKERS,
+    SnapshotWriter,
+    get_engine,
+    get_high_water_mark,
+    merge_table,
+    upload_tables,
+    upsert_table,
+    write_snapshot,
+)
+
+# First year of JOLTS data
+JOLTS_START_YEAR = 2003
+# Number of worker threads parsing and combining frames
+PARSE_MAX_WORKERS = 2
+# Number of items waiting between two stages of a streaming run
+STREAM_QUEUE_DEPTH = 4
+
+
+@dataclass(frozen=True)
+class TableSpec:
+    """Specification of a JOLTS table loaded by the pipeline
+
+    Each table combines the seasonally adjusted series (monthly estimates)
+    with the unadjusted series, which includes annual estimates if annual
+    is True.
+
+    Parameters
+    ----------
+    table : str
+        Name of the target table
+    name : str
+        Name given to the series in the table
+    element : str
+        Element of JOLTS Survey
+    rate_level : str
+        Rate ("R") or Level ("L")
+    geography : str
+        "state" for every state, or "industry" for every industry
+    annual : bool
+        If true, include annual estimates of the unadjusted series
+    """
+
+    table: str
+    name: str
+    element: str
+    rate_level: str = "R"
+    geography: str = "state"
+    annual: bool = True
+
+    def jolts_specs(self):
+        """Return the adjusted and unadjusted JoltsSpec of the table"""
+        return [
+            JoltsSpec(
+                name=self.name,
+                element=self.element,
+                rate_level=self.rate_level,
+                sa=sa,
+                annual=self.annual and sa == "U",
+                geography=self.geography,
+            )
+            for sa in ("S", "U")
+        ]
+
+
+def _env_flag(name):
+    return os.environ.get(name, "").lower() in ("1", "true", "yes")
+
+
+@dataclass
+class PipelineConfig:
+    """Settings of a pipeline run
+
+    Parameters
+    ----------
+    registration_key : str
+        BLS API registration key
+    pg_string : str
+        PostgreSQL connection string
+    schema : str
+        Schema (bit.io repository) of the target tables
+    end_year : int
+        Last year of data to download
+    start_year : int
+        First year of data to download
+    incremental : bool
+        If true, only re-download the revision window behind the latest
+        date already stored in each table
+    revision_months : int
+        Months behind the latest stored date that are re-downloaded
+    load_mode : str
+        "replace" reloads each table; "upsert" only writes new and changed
+        rows. Incremental replace runs use "merge".
+    copy_format : str
+        "csv" or "binary" COPY format for uploads
+    compact : bool
+        Keep frames in memory-compact dtypes (categorical labels, small ints)
+    max_series : int
+        Maximum number of series IDs per BLS API request
+    workers : dict
+        Number of worker threads of the "fetch", "parse" and "upload" pools
+    streaming : bool
+        If true, stream each downloaded request through parsing and
+        uploading instead of loading whole tables (see run_streaming)
+    queue_depth : int
+        Number of items waiting between two stages of a streaming run
+    snapshot_dir : str
+        Directory of the local table snapshots written after each upload
+        (see SnapshotWriter); empty to not write snapshots
+    derived_metrics : bool
+        If true, refresh the derived metrics tables of each table after
+        its upload (see refresh_derived_metrics)
+    source : str
+        "api" to download the series from the BLS API, or "flatfile" to
+        read them from the BLS flat files (see bls_flatfile.py)
+    """
+
+    registration_key: str
+    pg_string: str
+    schema: str
+    end_year: int
+    start_year: int = JOLTS_START_YEAR
+    incremental: bool = False
+    revision_months: int = 12
+    load_mode: str = "replace"
+    copy_format: str = "csv"
+    compact: bool = False
+    max_series: int = BLS_MAX_SERIES
+    workers: dict = field(
+        default_factory=lambda: {
+            "fetch": BLS_MAX_WORKERS,
+            "parse": PARSE_MAX_WORKERS,
+            "upload": UPLOAD_MAX_WORKERS,
+        }
+    )
+    streaming: bool = False
+    queue_depth: int = STREAM_QUEUE_DEPTH
+    snapshot_dir: str = SNAPSHOT_DIR
+    derived_metrics: bool = True
+    source: str = "api"
+
+    @classmethod
+    def from_env(cls):
+        """Build the configuration from environment variables"""
+        return cls(
+            registration_key=os.environ.get("BLS_API_KEY"),
+            pg_string=os.environ.get("BITIO_PG_STRING"),
+            schema=os.environ.get("BITIO_REPO"),
+            end_year=datetime.datetime.today().year,
+            incremental=_env_flag("JOLTS_INCREMENTAL"),
+            revision_months=int(os.environ.get("JOLTS_REVISION_MONTHS", 12)),
+            load_mode=os.environ.get("JOLTS_LOAD_MODE", "replace"),
+            copy_format=os.environ.get("JOLTS_COPY_FORMAT", "csv"),
+            compact=_env_flag("JOLTS_COMPACT"),
+            workers={
+                "fetch": int(os.environ.get("JOLTS_FETCH_WORKERS", BLS_MAX_WORKERS)),
+                "parse": int(os.environ.get("JOLTS_PARSE_WORKERS", PARSE_MAX_WORKERS)),
+                "upload": int(os.environ.get("JOLTS_UPLOAD_WORKERS", UPLOAD_MAX_WORKERS)),
+            },
+            streaming=_env_flag("JOLTS_STREAMING"),
+            queue_depth=int(os.environ.get("JOLTS_QUEUE_DEPTH", STREAM_QUEUE_DEPTH)),
+            derived_metrics=os.environ.get("JOLTS_DERIVED_METRICS", "1").lower()
+            in ("1", "true", "yes"),
+            source=os.environ.get("JOLTS_SOURCE", "api"),
+        )
+
+    def since_date(self, start_year):
+        """First date re-loaded into a table whose download starts at start_year
+
+        None when tables are fully reloaded.
+        """
+        if not self.incremental:
+            return None
+        return datetime.date(start_year, 1, 1)
+
+    @property
+    def upload_mode(self):
+        """Load mode passed to upload_table"""
+        if self.load_mode == "replace" and self.incremental:
+            return "merge"
+        return self.load_mode
+
+
+@dataclass
+class Task:
+    """A unit of work in the pipeline graph
+
+    func is called with the results of deps, in order, once they have all
+    finished. pool names the worker pool the task runs on. If keep is true
+    the result is returned by run_dag even if other tasks depend on it.
+    """
+
+    name: str
+    func: object
+    deps: tuple = ()
+    pool: str = "parse"
+    keep: bool = False
+
+
+@dataclass
+class TaskResult:
+    """Outcome of a Task
+
+    value is only kept for tasks no other task depends on, or with keep
+    set; results of other tasks are released once each of their
+    dependents has started or been skipped.
+    """
+
+    value: object = None
+    error: Exception = None
+    seconds: float = 0.0
+
+
+def _run_task(func, args):
+    start = time.perf_counter()
+    try:
+        return func(*args), None, time.perf_counter() - start
+    except Exception as e:
+        # The error is kept until the run ends, and the frames of its
+        # traceback would keep the task's arguments (whole tables) alive
+        args.clear()
+        error = e
+        while error is not None:
+            traceback.clear_frames(error.__traceback__)
+            error = error.__cause__ or error.__context__
+        return None, e, time.perf_counter() - start
+
+
+def run_dag(tasks, workers):
+    """Run a graph of tasks, each as soon as its dependencies are done
+
+    Independent tasks run concurrently, bounded by the size of the worker
+    pool each one is assigned to. A failed task does not stop the rest of
+    the graph; the tasks depending on it are skipped and given its error.
+
+    Parameters
+    ----------
+    tasks : list of Task
+        Tasks to run
+    workers : dict
+        Mapping of pool name to its number of worker threads
+
+    Returns
+    -------
+    dict
+        Mapping of task name to its TaskResult
+    """
+    tasks = {t.name: t for t in tasks}
+    dependents = {name: [] for name in tasks}
+    for t in tasks.values():
+        for dep in t.deps:
+            if dep not in tasks:
+                raise ValueError(f"Task {t.name} depends on unknown task {dep}")
+            dependents[dep].append(t.name)
+    waiting = {name: len(t.deps) for name, t in tasks.items()}
+    unreleased = {name: len(x) for name, x in dependents.items()}
+    values = {}
+    results = {}
+    running = {}
+    pools = {name: ThreadPoolExecutor(max_workers=max(1, n)) for name, n in workers.items()}
+
+    def release(name):
+        # a dependency's value is dropped once none of its dependents need it
+        for dep in tasks[name].deps:
+            unreleased[dep] -= 1
+            if unreleased[dep] == 0:
+                values.pop(dep, None)
+
+    def submit(name):
+        task = tasks[name]
+        args = [values[dep] for dep in task.deps]
+        release(name)
+        running[pools[task.pool].submit(_run_task, task.func, args)] = name
+
+    def skip(name, error):
+        if name not in results:
+            results[name] = TaskResult(error=error)
+            release(name)
+            for dep in dependents[name]:
+                skip(dep, error)
+
+    try:
+        for name, n in waiting.items():
+            if n == 0:
+                submit(name)
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                value, error, seconds = future.result()
+                if error is not None:
+                    results[name] = TaskResult(error=error, seconds=seconds)
+                    for dep in dependents[name]:
+                        skip(dep, error)
+                    continue
+                if unreleased[name]:
+                    values[name] = value
+                if dependents[name] and not tasks[name].keep:
+                    value = None
+                results[name] = TaskResult(value=value, seconds=seconds)
+                for dep in dependents[name]:
+                    waiting[dep] -= 1
+                    if waiting[dep] == 0 and dep not in results:
+                        submit(dep)
+    finally:
+        for pool in pools.values():
+            pool.shutdown(wait=True)
+
+    stuck = [name for name in tasks if name not in results]
+    if stuck:
+        raise ValueError(f"Dependency cycle between tasks: {', '.join(stuck)}")
+    return results
+
+
+def _fetch(config, request, window):
+    return fetch_bls_requests(
+        config.registration_key,
+        [request],
+        window[0],
+        window[1],
+        max_workers=1,
+        windows=[window],
+    )[0]
+
+
+def _parse(spec, fips, compact, *responses):
+    state_codes = list(fips["state_code"])
+    response_series = {
+        s["seriesID"]: s
+        for s in stitch_bls_series(s for series in responses for s in series)
+    }
+    spec_series = [
+        response_series[x] for x in spec.series_ids(state_codes) if x in response_series
+    ]
+    return parse_jolts_spec(spec_series, spec, fips, compact=compact)
+
+
+def _read_flatfile(config, filename, series_ids, start_year):
+    return read_flatfile(filename, series_ids, start_year, config.end_year)
+
+
+def _parse_flatfile(start_year, spec, fips, compact, parsed):
+    return parse_flatfile_spec(parsed, spec, fips, compact=compact, start_year=start_year)
+
+
+def _combine(compact, sa_df, u_df):
+    sa_df["seasonal_adjustment"] = "S"
+    u_df["seasonal_adjustment"] = "U"
+    if compact:
+        sa_df = compact_jolts_frame(sa_df)
+        u_df = compact_jolts_frame(u_df)
+    return concat_jolts_frames([sa_df, u_df])
+
+
+def _upload(config, table, df):
+    # tables are scheduled by run_dag, so one at a time here
+    loaded = upload_tables(
+        {table: df},
+        config.schema,
+        config.pg_string,
+        max_workers=1,
+        mode=config.upload_mode,
+        copy_format=config.copy_format,
+    )[table]
+    if loaded["error"] is not None:
+        raise loaded["error"]
+    return loaded["rows"], loaded["result"]
+
+
+def _snapshot(config, table, since_year, df, uploaded):
+    write_snapshot(df, table, config.snapshot_dir, since_year=since_year)
+
+
+def _metrics(config, table, since_date, uploaded):
+    return refresh_derived_metrics(
+        config.schema, table, config.pg_string, since_date=since_date
+    )
+
+
+def table_start_years(tables, config):
+    """Return the first year to download for each table
+
+    In incremental runs this is the start of the revision window behind
+    the latest date stored in the table.
+    """
+    if not config.incremental:
+        return {t.table: config.start_year for t in tables}
+
+    def start_year(t):
+        mark = get_high_water_mark(config.schema, t.table, config.pg_string)
+        return incremental_start_year(
+            mark, revision_months=config.revision_months, default=config.start_year
+        )
+
+    with ThreadPoolExecutor(max_workers=max(1, config.workers["upload"])) as pool:
+        return dict(zip((t.table for t in tables), pool.map(start_year, tables)))
+
+
+def build_tasks(tables, config, start_years, fips):
+    """Build the fetch, parse, combine and upload tasks for the tables
+
+    Series are planned across all tables with the same start year, so
+    series shared between tables are downloaded once and requests are
+    packed as full as possible. Each request has a fetch task per year
+    window (see year_windows), so the windows of long ranges are
+    downloaded concurrently, and stitched together when parsing. Each
+    spec is parsed as soon as the requests covering its series are done,
+    and each table is uploaded as soon as both of its specs are parsed.
+    Once uploaded, the local snapshot of the table is written if
+    config.snapshot_dir is set and its derived metrics are refreshed if
+    config.derived_metrics is set.
+
+    With config.source "flatfile", each BLS flat file is read once in place
+    of the fetch tasks, from the earliest start year of the tables, and
+    parsed for every spec it covers from the start year of its table.
+    """
+    if config.source not in ("api", "flatfile"):
+        raise ValueError(f"Unknown source: {config.source}")
+    state_codes = list(fips["state_code"])
+    tasks = []
+    owners = {}
+    if config.source == "flatfile":
+        files = {}
+        for t in tables:
+            for spec in t.jolts_specs():
+                files.setdefault(flatfile_name(spec.element), set()).update(
+                    spec.series_ids(state_codes)
+                )
+        first_year = min(start_years.values(), default=config.start_year)
+        for filename, series_ids in files.items():
+            name = f"read:{filename}"
+            tasks.append(
+                Task(
+                    name,
+                    partial(_read_flatfile, config, filename, series_ids, first_year),
+                    pool="fetch",
+                )
+            )
+            owners.update((series_id, [name]) for series_id in series_ids)
+
+    for start_year in sorted(set(start_years.values())):
+        group = [t for t in tables if start_years[t.table] == start_year]
+        specs = [spec for t in group for spec in t.jolts_specs()]
+
+        if config.source == "flatfile":
+            parse = partial(_parse_flatfile, start_year)
+        else:
+            owners = {}
+            plan = plan_bls_requests(specs, state_codes, max_series=config.max_series)
+            windows = year_windows(start_year, config.end_year)
+            for i, request in enumerate(plan):
+                # windows are newest first, as _parse expects
+                names = [f"fetch:{start_year}:{i}:{window[0]}" for window in windows]
+                for name, window in zip(names, windows):
+                    tasks.append(Task(name, partial(_fetch, config, request, window), pool="fetch"))
+                owners.update((series_id, names) for series_id in request[0])
+            parse = _parse
+
+        for t in group:
+            parsed = []
+            for spec in t.jolts_specs():
+                name = f"parse:{t.table}:{spec.sa}"
+                deps = tuple(
+                    dict.fromkeys(
+                        dep for x in spec.series_ids(state_codes) for dep in owners[x]
+                    )
+                )
+                tasks.append(Task(name, partial(parse, spec, fips, config.compact), deps))
+                parsed.append(name)
+            combine = f"combine:{t.table}"
+            upload = f"upload:{t.table}"
+            tasks.append(Task(combine, partial(_combine, config.compact), tuple(parsed)))
+            tasks.append(
+                Task(upload, partial(_upload, config, t.table), (combine,), "upload", keep=True)
+            )
+            if config.derived_metrics:
+                tasks.append(
+                    Task(
+                        f"metrics:{t.table}",
+                        partial(_metrics, config, t.table, config.since_date(start_year)),
+                        (upload,),
+                        "upload",
+                    )
+                )
+            if config.snapshot_dir:
+                since_year = start_year if config.incremental else None
+                tasks.append(
+                    Task(
+                        f"snapshot:{t.table}",
+                        partial(_snapshot, config, t.table, since_year),
+                        (combine, upload),
+                    )
+                )
+    return tasks
+
+
+# Marks the end of the items passed between streaming stages
+_DONE = object()
+
+
+def _run_stage(func, inbox, outbox, workers):
+    """Start worker threads applying func to the items of inbox
+
+    func returns an iterable of items, which are put on outbox. Once inbox
+    is exhausted and every worker has finished, _DONE is put on outbox.
+    """
+    remaining = [max(1, workers)]
+    lock = threading.Lock()
+
+    def work():
+        try:
+            while True:
+                item = inbox.get()
+                if item is _DONE:
+                    # leave the marker for the other workers
+                    inbox.put(_DONE)
+                    break
+                for out in func(item):
+                    outbox.put(out)
+        finally:
+            with lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last and outbox is not None:
+                outbox.put(_DONE)
+
+    threads = [threading.Thread(target=work, daemon=True) for _ in range(remaining[0])]
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+def run_streaming(tables, config):
+    """Download, parse and upload JOLTS tables as a stream of fragments
+
+    The year windows of each BLS API request are downloaded by the fetch
+    workers like separate requests. A request is parsed as soon as all of
+    its windows are downloaded, split into one fragment per table and spec
+    it covers, and each fragment is uploaded on its own. Stages are connected by queues holding at most
+    config.queue_depth items, so downloading, parsing and uploading overlap
+    and only a few requests are held in memory at a time.
+
+    Fragments replace the stored rows of their series (or are upserted,
+    with load mode "upsert"), so a table is fully refreshed once all of
+    its fragments are loaded. If a fragment fails, the remaining fragments
+    of its table are skipped; fragments loaded before the failure stay.
+    Local snapshots are written fragment by fragment and only replace the
+    previous snapshot of a table once all of its fragments are loaded.
+    Derived metrics are refreshed once every fragment has been loaded.
+
+    Parameters
+    ----------
+    tables : list of TableSpec
+        Tables to load
+    config : PipelineConfig
+        Settings of the run
+
+    Returns
+    -------
+    dict
+        Same as run_pipeline, with "seconds" the total upload time of the
+        fragments of each table
+    """
+    get_engine(config.pg_string, pool_size=config.workers["upload"])
+    fips = get_state_fips_codes()
+    state_codes = list(fips["state_code"])
+    start_years = table_start_years(tables, config)
+    mode = config.upload_mode
+
+    requests_queue = queue.Queue()
+    consumers = {}
+    # responses of each year window of a request, until all have arrived
+    pending = {}
+    for start_year in sorted(set(start_years.values())):
+        group = [t for t in tables if start_years[t.table] == start_year]
+        specs = []
+        for t in group:
+            for spec in t.jolts_specs():
+                specs.append(spec)
+                for series_id in spec.series_ids(state_codes):
+                    consumers.setdefault((start_year, series_id), []).append((t, spec))
+        windows = year_windows(start_year, config.end_year)
+        plan = plan_bls_requests(specs, state_codes, max_series=config.max_series)
+        for i, request in enumerate(plan):
+            pending[(start_year, i)] = [None] * len(windows)
+            for j, window in enumerate(windows):
+                requests_queue.put((start_year, i, request, j, window))
+    requests_queue.put(_DONE)
+
+    summary = {
+        t.table: {"rows": 0, "seconds": 0.0, "result": None, "error": None}
+        for t in tables
+    }
+    lock = threading.Lock()
+    table_locks = {t.table: threading.Lock() for t in tables}
+    writers = {}
+    if config.snapshot_dir:
+        writers = {
+            t.table: SnapshotWriter(
+                t.table,
+                config.snapshot_dir,
+                since_year=start_years[t.table] if config.incremental else None,
+            )
+            for t in tables
+        }
+
+    def fail(table, error):
+        with lock:
+            if summary[table]["error"] is None:
+                summary[table]["error"] = error
+
+    def fetch(item):
+        start_year, i, request, j, window = item
+        try:
+            response_series = _fetch(config, request, window)
+        except Exception as e:
+            response_series = e
+        with lock:
+            pieces = pending[(start_year, i)]
+            pieces[j] = response_series
+            if any(x is None for x in pieces):
+                return []
+            del pending[(start_year, i)]
+        errors = [x for x in pieces if isinstance(x, Exception)]
+        if errors:
+            for series_id in request[0]:
+                for t, _ in consumers[(start_year, series_id)]:
+                    fail(t.table, errors[0])
+            return []
+        # windows are newest first, as stitch_bls_series expects
+        return [(start_year, stitch_bls_series(s for x in pieces for s in x))]
+
+    def parse(item):
+        start_year, response_series = item
+        groups = {}
+        for s in response_series:
+            for key in consumers.get((start_year, s["seriesID"]), ()):
+                groups.setdefault(key, []).append(s)
+        fragments = []
+        for (t, spec), spec_series in groups.items():
+            if summary[t.table]["error"] is not None:
+                continue
+            try:
+                df = parse_jolts_spec(spec_series, spec, fips, compact=config.compact)
+                df["seasonal_adjustment"] = spec.sa
+                if config.compact:
+                    df = compact_jolts_frame(df)
+                if t.annual:
+                    # match the column type of the table with annual rows,
+                    # whether or not this fragment has any
+                    df["month"] = df["month"].astype("float64")
+                fragments.append((t, df))
+            except Exception as e:
+                fail(t.table, e)
+        return fragments
+
+    def upload(item):
+        t, df = item
+        # fragments of a table are loaded one at a time
+        with table_locks[t.table]:
+            if summary[t.table]["error"] is not None:
+                return []
+            start = time.perf_counter()
+            try:
+                if mode == "upsert":
+                    result = upsert_table(
+                        df, config.schema, t.table, config.pg_string,
+                        copy_format=config.copy_format,
+                    )
+                else:
+                    result = merge_table(
+                        df,
+                        config.schema,
+                        t.table,
+                        config.pg_string,
+                        since_year=start_years[t.table],
+                        copy_format=config.copy_format,
+                        series=df["series"].unique(),
+                    )
+                if writers:
+                    writers[t.table].write(df)
+            except Exception as e:
+                fail(t.table, e)
+                return []
+            seconds = time.perf_counter() - start
+            TELEMETRY.observe("upload", seconds, table=t.table)
+            TELEMETRY.count("rows_uploaded", len(df), table=t.table)
+            with lock:
+                totals = summary[t.table]
+                totals["rows"] += len(df)
+                totals["seconds"] += seconds
+                if result is not None:
+                    totals["result"] = {
+                        k: v + (totals["result"] or {}).get(k, 0)
+                        for k, v in result.items()
+                    }
+        return []
+
+    fetched = queue.Queue(maxsize=max(1, config.queue_depth))
+    parsed = queue.Queue(maxsize=max(1, config.queue_depth))
+    threads = _run_stage(fetch, requests_queue, fetched, config.workers["fetch"])
+    threads += _run_stage(parse, fetched, parsed, config.workers["parse"])
+    threads += _run_stage(upload, parsed, None, config.workers["upload"])
+    for thread in threads:
+        thread.join()
+
+    for table, writer in writers.items():
+        if summary[table]["error"] is not None:
+            writer.abort()
+            continue
+        try:
+            writer.commit()
+        except Exception as e:
+            writer.abort()
+            summary[table]["error"] = e
+
+    if config.derived_metrics:
+        for t in tables:
+            if summary[t.table]["error"] is not None:
+                continue
+            try:
+                refresh_derived_metrics(
+                    config.schema,
+                    t.table,
+                    config.pg_string,
+                    since_date=config.since_date(start_years[t.table]),
+                )
+            except Exception as e:
+                summary[t.table]["error"] = e
+
+    if mode == "upsert":
+        for totals in summary.values():
+            if totals["error"] is None and totals["result"] is None:
+                totals["result"] = {"inserted": 0, "updated": 0, "unchanged": 0}
+    return summary
+
+
+def run_pipeline(tables, config):
+    """Download, combine and upload JOLTS tables
+
+    With config.streaming, tables are loaded with run_streaming instead
+    (from the BLS API only).
+
+    Parameters
+    ----------
+    tables : list of TableSpec
+        Tables to load
+    config : PipelineConfig
+        Settings of the run
+
+    Returns
+    -------
+    dict
+        Mapping of table name to a dict with the number of "rows", the
+        upload time in "seconds", the upload_table "result" and the
+        exception raised while building or loading the table, if any, as
+        "error"
+    """
+    # every upload worker holds a connection
+    get_engine(config.pg_string, pool_size=config.workers["upload"])
+    if config.streaming:
+        if config.source != "api":
+            raise ValueError("Streaming runs only support the BLS API source")
+        return run_streaming(tables, config)
+
+    fips = get_state_fips_codes()
+    start_years = table_start_years(tables, config)
+    results = run_dag(build_tasks(tables, config, start_years, fips), config.workers)
+
+    summary = {}
+    for t in tables:
+        upload = results[f"upload:{t.table}"]
+        rows, result = upload.value if upload.error is None else (None, None)
+        error = upload.error
+        for step in ("snapshot", "metrics"):
+            if error is None and f"{step}:{t.table}" in results:
+                error = results[f"{step}:{t.table}"].error
+        summary[t.table] = {
+            "rows": rows,
+            "seconds": upload.seconds,
+            "result": result,
+            "error": error,
+        }
+    return summary
@@ -1,5 +1,10 @@
 import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
+import re
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from PIL import Image
 from pathlib import Path
 import matplotlib as mpl
@@ -15,12 +20,32 @@ OXFORD = "#121C3B"
 PINK = "#DB9995"
 GREY = "#788995"
 
+RESOURCES_DIR = Path(__file__).resolve().parent.parent / "resources"
+STYLE_PATH = str(RESOURCES_DIR / "bitdotio.mplstyle")
+LOGO_PATH = str(RESOURCES_DIR / "logo.png")
+TWITTER_PATH = str(RESOURCES_DIR / "twitter.png")
+FIGURES_DIR = "./figures"
+
+
+@lru_cache(maxsize=None)
+def use_style(style_path=STYLE_PATH):
+    """Apply a matplotlib style file, once per process"""
+    plt.style.use(style_path)
+
+
+@lru_cache(maxsize=None)
+def load_image(path):
+    """Return an image file as an array, read once per process"""
+    with Image.open(path) as image:
+        return np.asarray(image)
+
+
 def format_bitdotio(fig,
                     title="Add Title",
                     rect=[0.02,0.1,0.97,0.9],
                     text="Add Text",
-                    logo_path="../resources/logo.png",
-                    twitter_path="../resources/twitter.png",):
+                    logo_path=LOGO_PATH,
+                    twitter_path=TWITTER_PATH,):
     """Utility function for applying bit.io formatting"""
     fig.tight_layout(rect=rect)
     if text:
@@ -30,13 +55,13 @@ def format_bitdotio(fig,
         fig.suptitle(title, x=0.1, y=0.96,
                     fontweight="bold", ha="left", fontdict={"family":"Inter", "size":8, "color":"black", "alpha":0.8})
     if logo_path:
-        logo=Image.open(logo_path)
+        logo=load_image(logo_path)
         logo_ax = plt.axes([0.8,0.88, 0.13, 0.13], frameon=True) 
         logo_ax.imshow(logo)
         logo_ax.axis('off')
         logo_ax.patch.set_facecolor("white")
     if twitter_path:
-        twitter=Image.open(twitter_path)
+        twitter=load_image(twitter_path)
         twt = plt.axes([0.8,0.0, 0.13, 0.13], frameon=True) 
         twt.imshow(twitter)
         twt.axis('off')
@@ -47,11 +72,17 @@ def format_bitdotio(fig,
 
 
 
-def labor_turnover_rates(layoffs_data, quits_data, openings_data, recessions_data, save=False, show=True):
+def labor_turnover_rates(layoffs_data, quits_data, openings_data, recessions_data, save=False, show=True,
+                         title="Labor Turnover Rates by Month, 2002-2021", line_labels=True,
+                         filename="turnover_rates_fig.png", figures_dir=FIGURES_DIR):
     """
     Plot labor turnover rates.
+
+    With line_labels, the lines are labeled at fixed positions matching the
+    national rates; otherwise a legend is drawn. If save is true the figure
+    is written to figures_dir/filename. Returns the figure.
     """
-    plt.style.use("../resources/bitdotio.mplstyle")
+    use_style()
     fig, ax = plt.subplots(figsize=(8, 4))
 
     # Plot Lines
@@ -59,9 +90,13 @@ def labor_turnover_rates(layoffs_data, quits_data, openings_data, recessions_dat
     ax.plot(quits_data.date, quits_data.value, c=BLUE, linewidth=2, label="Quit Rate")
     ax.plot(openings_data.date, openings_data.value, c=GREEN, linewidth=2, label="Job Openings")
 
-    # Plot Recessions
-    ax.fill_between(recessions_data['date'], 0,1, where=recessions_data['value']==1, transform=ax.get_xaxis_transform(),
-                    alpha=0.2, facecolor=GREY, linewidth=0)
+    # Plot Recessions, given as start/end intervals or as a monthly indicator
+    if "start" in recessions_data.columns:
+        for start, end in zip(recessions_data["start"], recessions_data["end"]):
+            ax.axvspan(start, end, alpha=0.2, facecolor=GREY, linewidth=0)
+    else:
+        ax.fill_between(recessions_data['date'], 0,1, where=recessions_data['value']==1, transform=ax.get_xaxis_transform(),
+                        alpha=0.2, facecolor=GREY, linewidth=0)
 
     # Labels
     ax.set_xlabel("Date")
@@ -74,12 +109,15 @@ def labor_turnover_rates(layoffs_data, quits_data, openings_data, recessions_dat
     ax.set_xlim(left=pd.Timestamp("2003-01-01"), right=pd.Timestamp("2023-12-31"))
 
     # labels at end of lines
-    labels = ["Job Openings", "Quits", "Layoffs/Discharges"]
-    x = pd.to_datetime("today")
-    y = [6.5, 2.9, 0.8]
-    colors = [GREEN, BLUE, RED]
-    for i, label in enumerate(labels):
-        ax.annotate(text=label, xy=(x, y[i]), xytext=(x,y[i]), textcoords="data", color=colors[i], fontsize=8, fontweight="bold")
+    if line_labels:
+        labels = ["Job Openings", "Quits", "Layoffs/Discharges"]
+        x = pd.to_datetime("today")
+        y = [6.5, 2.9, 0.8]
+        colors = [GREEN, BLUE, RED]
+        for i, label in enumerate(labels):
+            ax.annotate(text=label, xy=(x, y[i]), xytext=(x,y[i]), textcoords="data", color=colors[i], fontsize=8, fontweight="bold")
+    else:
+        ax.legend(loc="upper left", fontsize=7, frameon=False)
 
     ax.annotate(text = "2007-09\nRecession", xy=(pd.to_datetime("2007-12-20"), 4.1), xytext=(pd.to_datetime("2007-12-20"), 4.1), textcoords="data", color=GREY, fontsize=7)
     ax.annotate(text = "COVID-19 Recession", xy=(pd.to_datetime("2020-02-01"), 0.1), xytext=(pd.to_datetime("2020-02-01"), 0.1), textcoords="data", color=GREY, fontsize=7, horizontalalignment="right")
@@ -88,14 +126,72 @@ def labor_turnover_rates(layoffs_data, quits_data, openings_data, recessions_dat
     ## Ticks
     ax.tick_params(which='both', bottom=True, left=True, color=GREY)
 
-    fig = format_bitdotio(fig, title="Labor Turnover Rates by Month, 2002-2021", text="Source: Bureau of Labor Statistics Job Openings and Labor Turnover Survey\nAccess the Data at https://bit.io/bitdotio/bls_quit_rate",
-                        logo_path="../resources/logo.png", twitter_path="../resources/twitter.png")
+    fig = format_bitdotio(fig, title=title, text="Source: Bureau of Labor Statistics Job Openings and Labor Turnover Survey\nAccess the Data at https://bit.io/bitdotio/bls_quit_rate")
     if show:
         plt.show()
     if save:
-        if not Path("./figures/").exists():
-            Path("./figures/").mkdir()
-        plt.savefig("./figures/turnover_rates_fig.png")
+        Path(figures_dir).mkdir(parents=True, exist_ok=True)
+        fig.savefig(Path(figures_dir) / filename)
+    return fig
+
+
+def _init_render_worker():
+    """Switch a rendering process to Agg and load the shared assets once"""
+    plt.switch_backend("Agg")
+    use_style()
+    load_image(LOGO_PATH)
+    load_image(TWITTER_PATH)
+
+
+def _render_turnover_chart(job):
+    filename, title, layoffs, quits, openings, recessions, figures_dir = job
+    fig = labor_turnover_rates(layoffs, quits, openings, recessions, save=True, show=False,
+                               title=title, line_labels=False, filename=filename, figures_dir=figures_dir)
+    plt.close(fig)
+    return str(Path(figures_dir) / filename)
+
+
+def _slug(text):
+    return re.sub(r"[^a-z0-9]+", "_", str(text).lower()).strip("_")
+
+
+def render_turnover_charts(layoffs_data, quits_data, openings_data, recessions_data, by="state",
+                           figures_dir=FIGURES_DIR, max_workers=None, sa="S"):
+    """
+    Render one labor turnover chart per state or industry.
+
+    The data are the full tables (e.g. quit_rate, or industry_quit_rate for
+    by="industry"). Monthly estimates with seasonal adjustment sa are
+    plotted for each code in the by + "_code" column, titled and named by
+    its label in the by column; several codes can share a label (e.g. the
+    Manufacturing industries), and their charts add the code to it. Charts
+    are drawn on the Agg backend across a pool of max_workers processes,
+    each of which loads the style and images once, and saved as PNG files
+    to figures_dir.
+
+    Returns the paths of the saved charts.
+    """
+    code = f"{by}_code"
+
+    def monthly(df):
+        df = df[df["date"].notnull() & (df["seasonally_adjusted"] == sa)]
+        return {
+            str(key): group.sort_values("date")
+            for key, group in df.groupby(code, sort=False, observed=True)
+        }
+
+    layoffs, quits, openings = monthly(layoffs_data), monthly(quits_data), monthly(openings_data)
+    labels = {key: str(group[by].iloc[0]) for key, group in quits.items()}
+    counts = Counter(labels.values())
+    labels = {key: f"{x} ({key})" if counts[x] > 1 else x for key, x in labels.items()}
+    jobs = [
+        (f"turnover_rates_{by}_{_slug(label)}.png", f"Labor Turnover Rates by Month, {label}",
+         layoffs.get(key, layoffs_data.head(0)), quits[key], openings.get(key, openings_data.head(0)),
+         recessions_data, figures_dir)
+        for key, label in labels.items()
+    ]
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_render_worker) as pool:
+        return list(pool.map(_render_turnover_chart, jobs))
 
 
 
@@ -0,0 +1,39 @@
+import os
+
+import pandas as pd
+from dotenv import load_dotenv
+
+from bls_query import get_recessions_fred
+from fred import recession_intervals
+from plots import FIGURES_DIR, render_turnover_charts
+from upload_download_bitdotio import load_datasets
+
+# Tables plotted per state and per industry: (layoffs, quits, openings)
+CHART_TABLES = {
+    "state": ("layoffs_discharges_rate", "quit_rate", "job_openings_rate"),
+    "industry": ("industry_ld_rate", "industry_quit_rate", "industry_openings_rate"),
+}
+
+if __name__ == "__main__":
+    load_dotenv()
+    PG_STRING = os.environ.get("BITIO_PG_STRING")
+    FRED_KEY = os.environ.get("FRED_API_KEY")
+    BITIO_REPO = os.environ.get("BITIO_REPO")
+    FIGURES = os.environ.get("JOLTS_FIGURES_DIR", FIGURES_DIR)
+
+    recessions = recession_intervals(
+        get_recessions_fred(FRED_KEY, end_date=pd.to_datetime("today").strftime("%Y-%m-%d"))
+    )
+    columns = ["date", "value", "seasonally_adjusted"]
+    for by, tables in CHART_TABLES.items():
+        data = load_datasets(
+            list(tables),
+            BITIO_REPO,
+            PG_STRING,
+            columns=columns + [by, f"{by}_code"],
+            filters=[("date", "not null", None), ("seasonally_adjusted", "==", "S")],
+        )
+        paths = render_turnover_charts(
+            *(data[t] for t in tables), recessions, by=by, figures_dir=FIGURES
+        )
+        print(f"{len(paths)} {by} charts written to {FIGURES}")
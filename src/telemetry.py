@@ -0,0 +1,170 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Upper bounds, in seconds, of the latency histogram buckets
+LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# Prefix of the exported Prometheus metric names
+METRIC_PREFIX = "jolts"
+# Directory receiving the run report and Prometheus textfile of main.py
+TELEMETRY_DIR = os.environ.get(
+    "JOLTS_TELEMETRY_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "telemetry"),
+)
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (
+        (k, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for k, v in pairs
+    )
+    return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+
+
+class Telemetry:
+    """Thread-safe latency histograms and counters of a run
+
+    Latencies are recorded per operation (e.g. "bls_request", "upload")
+    and counters per name (e.g. "api_calls", "bytes_in", "rows"), each
+    with optional labels.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Drop every recorded value and restart the run clock"""
+        with self._lock:
+            self._histograms = {}
+            self._counters = {}
+            self.started = time.time()
+
+    def observe(self, operation, seconds, **labels):
+        """Record the latency of one operation"""
+        key = (operation, _label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = {
+                    "counts": [0] * (len(self.buckets) + 1),
+                    "sum": 0.0,
+                    "count": 0,
+                    "max": 0.0,
+                }
+                self._histograms[key] = histogram
+            histogram["counts"][bisect_left(self.buckets, seconds)] += 1
+            histogram["sum"] += seconds
+            histogram["count"] += 1
+            histogram["max"] = max(histogram["max"], seconds)
+
+    def count(self, name, value=1, **labels):
+        """Add value to a counter"""
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    @contextmanager
+    def timed(self, operation, **labels):
+        """Record the latency of the enclosed block, even if it raises"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(operation, time.perf_counter() - start, **labels)
+
+    def report(self):
+        """Return the recorded values as a JSON-serializable dict"""
+        with self._lock:
+            latencies = [
+                {
+                    "operation": operation,
+                    "labels": dict(labels),
+                    "count": h["count"],
+                    "sum_seconds": h["sum"],
+                    "max_seconds": h["max"],
+                    "buckets": dict(
+                        zip([str(b) for b in self.buckets] + ["+Inf"], h["counts"])
+                    ),
+                }
+                for (operation, labels), h in sorted(self._histograms.items())
+            ]
+            counters = [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(self._counters.items())
+            ]
+        return {
+            "started": self.started,
+            "duration_seconds": time.time() - self.started,
+            "latencies": latencies,
+            "counters": counters,
+        }
+
+    def prometheus(self):
+        """Return the recorded values in the Prometheus text format"""
+        lines = []
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            counters = sorted(self._counters.items())
+        for operation in sorted({op for (op, _), _ in histograms}):
+            name = f"{METRIC_PREFIX}_{operation}_seconds"
+            lines.append(f"# TYPE {name} histogram")
+            for (op, labels), h in histograms:
+                if op != operation:
+                    continue
+                cumulative = 0
+                for bound, n in zip(list(self.buckets) + ["+Inf"], h["counts"]):
+                    cumulative += n
+                    le = bound if bound == "+Inf" else repr(float(bound))
+                    lines.append(
+                        f"{name}_bucket{_format_labels(labels, [('le', le)])} {cumulative}"
+                    )
+                lines.append(f"{name}_sum{_format_labels(labels)} {h['sum']}")
+                lines.append(f"{name}_count{_format_labels(labels)} {h['count']}")
+        for counter in sorted({n for (n, _), _ in counters}):
+            name = f"{METRIC_PREFIX}_{counter}_total"
+            lines.append(f"# TYPE {name} counter")
+            for (n, labels), value in counters:
+                if n == counter:
+                    lines.append(f"{name}{_format_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, directory, name="jolts_run"):
+        """Write the JSON report and the Prometheus textfile of the run
+
+        Files are written atomically, so a node exporter never reads a
+        partial textfile.
+
+        Returns
+        -------
+        tuple
+            Paths of the JSON report and of the Prometheus textfile
+        """
+        os.makedirs(directory, exist_ok=True)
+        paths = []
+        for suffix, text in (
+            ("json", json.dumps(self.report(), indent=2)),
+            ("prom", self.prometheus()),
+        ):
+            path = os.path.join(directory, f"{name}.{suffix}")
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp_path, path)
+            paths.append(path)
+        return tuple(paths)
+
+
+# Telemetry shared by the BLS, FRED and bit.io clients
+TELEMETRY = Telemetry()
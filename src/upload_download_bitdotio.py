@@ -1,12 +1,128 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 import csv
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from io import StringIO
+from tempfile import SpooledTemporaryFile
+from itertools import islice
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+from pyarrow import feather, fs
 
-def psql_insert_copy(table, conn, keys, data_iter):
+from filters import arrow_expression, sql_where
+from jolts_codec import decode_jolts_ids
+from telemetry import TELEMETRY
+
+# Columns identifying a row of a JOLTS table. Annual averages have no month,
+# so it is coalesced to keep the key unique.
+UPSERT_KEYS = ('"series"', '"year"', 'COALESCE("month", 0)')
+# Rows serialized per chunk when streaming data to COPY
+COPY_CHUNK_ROWS = 10000
+# Bytes requested from the stream by each psycopg2 read during COPY
+COPY_READ_SIZE = 64 * 1024
+# Bytes of COPY output held in memory before spilling to a temporary file
+COPY_SPOOL_BYTES = 64 * 1024 * 1024
+# Default number of tables uploaded concurrently by upload_tables
+UPLOAD_MAX_WORKERS = 4
+# Directory of the local snapshots of the uploaded tables
+SNAPSHOT_DIR = os.environ.get(
+    "JOLTS_SNAPSHOT_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "snapshots"),
+)
+
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def get_engine(pg_string, pool_size=None):
+    """Return a pooled engine shared by every call using pg_string
+
+    The pool holds UPLOAD_MAX_WORKERS connections, or pool_size if a
+    caller needs more. Asking for a larger pool replaces the shared engine,
+    so callers running more concurrent workers size it before they start.
+    The replaced engine is disposed; connections still checked out from it
+    are closed once they are returned.
+    """
+    with _engines_lock:
+        engine = _engines.get(pg_string)
+        if engine is None or (pool_size is not None and pool_size > engine.pool.size()):
+            size = max(UPLOAD_MAX_WORKERS, pool_size or 0)
+            if engine is not None:
+                engine.dispose()
+            engine = _engines[pg_string] = create_engine(pg_string, pool_size=size)
+        return engine
+
+
+class IterStream:
+    """Read-only file-like object over an iterator of string chunks
+
+    Chunks are only produced as the reader asks for more data, so COPY can
+    start sending rows before the whole table has been serialized. Pass
+    empty=b"" for an iterator of bytes. size counts the characters (or
+    bytes) read so far.
+    """
+
+    def __init__(self, chunks, empty=""):
+        self._chunks = iter(chunks)
+        self._empty = empty
+        self._buf = empty
+        self._pos = 0
+        self.size = 0
+
+    def read(self, size=-1):
+        parts = []
+        remaining = size
+        while size < 0 or remaining > 0:
+            if self._pos >= len(self._buf):
+                self._buf = next(self._chunks, None)
+                self._pos = 0
+                if self._buf is None:
+                    self._buf = self._empty
+                    break
+            if size < 0:
+                end = len(self._buf)
+            else:
+                end = min(len(self._buf), self._pos + remaining)
+                remaining -= end - self._pos
+            parts.append(self._buf[self._pos : end])
+            self.size += end - self._pos
+            self._pos = end
+        return self._empty.join(parts)
+
+    def readline(self, size=-1):
+        return self.read(size)
+
+
+def csv_chunks(data_iter, chunk_size=COPY_CHUNK_ROWS):
+    """Serialize rows to CSV, yielding one string per chunk of rows"""
+    s_buf = StringIO()
+    writer = csv.writer(s_buf)
+    data_iter = iter(data_iter)
+    while True:
+        rows = list(islice(data_iter, chunk_size))
+        if not rows:
+            return
+        writer.writerows(rows)
+        yield s_buf.getvalue()
+        s_buf.seek(0)
+        s_buf.truncate()
+
+
+def psql_insert_copy(table, conn, keys, data_iter, chunk_size=COPY_CHUNK_ROWS):
     """
     Execute SQL statement inserting data
 
+    Rows are serialized to CSV in chunks of chunk_size rows as psycopg2
+    reads them, so memory use does not grow with the size of the table.
+
     Parameters
     ----------
     table : pandas.io.sql.SQLTable
@@ -14,23 +130,287 @@ def psql_insert_copy(table, conn, keys, data_iter):
     keys : list of str
         Column names
     data_iter : Iterable that iterates the values to be inserted
+    chunk_size : int
+        Number of rows serialized at a time
     """
     # gets a DBAPI connection that can provide a cursor
     dbapi_conn = conn.connection
     with dbapi_conn.cursor() as cur:
-        s_buf = StringIO()
-        writer = csv.writer(s_buf)
-        writer.writerows(data_iter)
-        s_buf.seek(0)
+        stream = IterStream(csv_chunks(data_iter, chunk_size=chunk_size))
 
         columns = ', '.join(f'"{k}"' for k in keys)
-        table_name = f'"{table.schema}"."{table.name}"'
+        table_name = _copy_table_name(table)
         sql = f'COPY {table_name} ({columns}) FROM STDIN WITH CSV'
-        cur.copy_expert(sql=sql, file=s_buf)
+        cur.copy_expert(sql=sql, file=stream, size=COPY_READ_SIZE)
+    TELEMETRY.count("bytes_out", stream.size, source="db")
+
+
+def widen_float32(df):
+    """Return df with float32 columns converted to float64
+
+    Each value becomes the float64 nearest its shortest decimal
+    representation (so float32 2.3 is loaded as 2.3, not 2.2999999523),
+    matching the values of frames that were never narrowed.
+    """
+    columns = [c for c in df.columns if df[c].dtype == np.float32]
+    if not columns:
+        return df
+    return df.assign(
+        **{c: df[c].to_numpy().astype(str).astype(np.float64) for c in columns}
+    )
+
+
+def widen_compact_dtypes(df):
+    """Return df with the dtypes of compact_jolts_frame widened back
+
+    float32 columns are widened as in widen_float32, small integers become
+    int64 and nullable integers int64, or float64 if they hold missing
+    values. A compact frame then creates the same table columns as a
+    frame that was never narrowed.
+    """
+    df = widen_float32(df)
+    converted = {}
+    for c in df.columns:
+        dtype = df[c].dtype
+        if isinstance(dtype, pd.api.extensions.ExtensionDtype):
+            if pd.api.types.is_integer_dtype(dtype):
+                converted[c] = (
+                    df[c].astype(np.float64)
+                    if df[c].isna().any()
+                    else df[c].astype(np.int64)
+                )
+        elif dtype.kind in "iu" and dtype != np.int64:
+            converted[c] = df[c].astype(np.int64)
+    return df.assign(**converted) if converted else df
+
+
+def _copy_table_name(table):
+    if table.schema:
+        return f'"{table.schema}"."{table.name}"'
+    return f'"{table.name}"'
+
+
+# PostgreSQL binary COPY framing
+BINARY_COPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + bytes(8)
+BINARY_COPY_TRAILER = b"\xff\xff"
+# Microseconds and days between the Unix and PostgreSQL (2000-01-01) epochs
+_PG_EPOCH_US = 946684800 * 10**6
+_PG_EPOCH_DAYS = 10957
+
+
+def _column_types(cur, table_name):
+    """Return a mapping of column name to PostgreSQL type name"""
+    cur.execute(
+        "SELECT attname, atttypid::regtype::text FROM pg_attribute "
+        "WHERE attrelid = %s::regclass AND attnum > 0 AND NOT attisdropped",
+        (table_name,),
+    )
+    return dict(cur.fetchall())
+
+
+def _fixed_width(values, dtype):
+    """View values as big-endian bytes, one row per value"""
+    values = np.ascontiguousarray(values, dtype=dtype)
+    return values.view(np.uint8).reshape(len(values), values.dtype.itemsize)
+
+
+def _encode_binary_column(col, pg_type):
+    """Encode a column as binary COPY field payloads
+
+    Returns
+    -------
+    tuple of numpy.ndarray
+        Null mask, payload length of each value and a 2-D uint8 array
+        holding each payload left-aligned in its row
+    """
+    if pg_type in ("text", "character varying", "character"):
+        # encode each distinct value once and index by the factorized codes
+        codes, uniques = pd.factorize(col)
+        null = codes < 0
+        text = np.asarray(uniques, dtype=object).astype(str)
+        if len(text) == 0:
+            text = np.array([""])
+        encoded = np.char.encode(text, "utf-8")
+        lengths = np.char.str_len(encoded).astype(np.int64)
+        data = encoded.view(np.uint8).reshape(len(text), encoded.dtype.itemsize)
+        codes = np.where(null, 0, codes)
+        return null, lengths[codes], data[codes]
+    null = col.isna().to_numpy()
+    if pg_type in ("timestamp without time zone", "timestamp with time zone"):
+        values = col if col.dtype.kind == "M" else pd.to_datetime(col)
+        if values.dt.tz is not None:
+            values = values.dt.tz_convert("UTC").dt.tz_localize(None)
+        micros = values.to_numpy(dtype="datetime64[us]").view(np.int64)
+        data = _fixed_width(np.where(null, 0, micros - _PG_EPOCH_US), ">i8")
+    elif pg_type == "date":
+        days = pd.to_datetime(col).to_numpy(dtype="datetime64[D]").view(np.int64)
+        data = _fixed_width(np.where(null, 0, days - _PG_EPOCH_DAYS), ">i4")
+    elif pg_type in ("smallint", "integer", "bigint", "boolean"):
+        dtype = {"smallint": ">i2", "integer": ">i4", "bigint": ">i8", "boolean": "?"}
+        values = col.to_numpy(dtype=np.int64, na_value=0)
+        data = _fixed_width(values, dtype[pg_type])
+    elif pg_type in ("real", "double precision"):
+        dtype = ">f4" if pg_type == "real" else ">f8"
+        values = col.to_numpy(dtype=np.float64, na_value=np.nan)
+        data = _fixed_width(values, dtype)
+    else:
+        raise TypeError(
+            f"Binary COPY does not support column type {pg_type}; use CSV"
+        )
+    lengths = np.full(len(col), data.shape[1], dtype=np.int64)
+    return null, lengths, data
+
+
+def encode_binary_rows(df, pg_types):
+    """Encode the rows of df in PostgreSQL binary COPY format
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Rows to encode
+    pg_types : list of str
+        PostgreSQL type of each column of df
+
+    Returns
+    -------
+    bytes
+        Encoded tuples, without the COPY header and trailer
+    """
+    n = len(df)
+    columns = [
+        _encode_binary_column(df.iloc[:, i], pg_type)
+        for i, pg_type in enumerate(pg_types)
+    ]
+    # Lay every row out at the maximum width of each field, then drop the
+    # unused payload bytes of short and NULL values with a single mask
+    field_count = np.frombuffer(np.array(len(columns), dtype=">i2").tobytes(), np.uint8)
+    blocks = [np.broadcast_to(field_count, (n, 2))]
+    masks = [np.ones((n, 2), dtype=bool)]
+    for null, lengths, data in columns:
+        blocks.append(_fixed_width(np.where(null, -1, lengths), ">i4"))
+        masks.append(np.ones((n, 4), dtype=bool))
+        blocks.append(data)
+        used = np.where(null, 0, lengths)
+        masks.append(np.arange(data.shape[1]) < used[:, None])
+    return np.hstack(blocks)[np.hstack(masks)].tobytes()
 
 
-def upload_table(df, upload_schema, upload_table, bitio_pg_string):
-    engine = create_engine(bitio_pg_string)
+def binary_chunks(df, pg_types, chunk_size=COPY_CHUNK_ROWS):
+    """Encode df in binary COPY format, yielding one bytes per chunk of rows"""
+    yield BINARY_COPY_HEADER
+    for start in range(0, len(df), chunk_size):
+        yield encode_binary_rows(df.iloc[start : start + chunk_size], pg_types)
+    yield BINARY_COPY_TRAILER
+
+
+def psql_insert_copy_binary(table, conn, keys, data_iter, chunk_size=COPY_CHUNK_ROWS):
+    """
+    Execute SQL statement inserting data with binary COPY
+
+    Columns are encoded with NumPy from the DataFrame being written,
+    converted to the types of the target table's columns. data_iter is not
+    used, so this method does not support the to_sql chunksize argument.
+
+    Parameters
+    ----------
+    table : pandas.io.sql.SQLTable
+    conn : sqlalchemy.engine.Engine or sqlalchemy.engine.Connection
+    keys : list of str
+        Column names
+    data_iter : Iterable that iterates the values to be inserted
+    chunk_size : int
+        Number of rows encoded at a time
+    """
+    dbapi_conn = conn.connection
+    with dbapi_conn.cursor() as cur:
+        table_name = _copy_table_name(table)
+        column_types = _column_types(cur, table_name)
+        pg_types = [column_types[k] for k in keys]
+        frame = table.frame.loc[:, keys]
+        stream = IterStream(
+            binary_chunks(frame, pg_types, chunk_size=chunk_size), empty=b""
+        )
+
+        columns = ', '.join(f'"{k}"' for k in keys)
+        sql = f"COPY {table_name} ({columns}) FROM STDIN WITH (FORMAT binary)"
+        cur.copy_expert(sql=sql, file=stream, size=COPY_READ_SIZE)
+    TELEMETRY.count("bytes_out", stream.size, source="db")
+
+
+def copy_method(copy_format="csv", chunk_size=COPY_CHUNK_ROWS):
+    """Return the to_sql insertion method for a COPY format ("csv" or "binary")"""
+    if copy_format == "csv":
+        return partial(psql_insert_copy, chunk_size=chunk_size)
+    if copy_format == "binary":
+        return partial(psql_insert_copy_binary, chunk_size=chunk_size)
+    raise ValueError(f"Unknown COPY format: {copy_format}")
+
+
+def upload_table(
+    df,
+    upload_schema,
+    upload_table,
+    bitio_pg_string,
+    mode="replace",
+    copy_chunk_size=COPY_CHUNK_ROWS,
+    copy_format="csv",
+):
+    """Load df into a table
+
+    With mode "replace" the table is truncated and fully reloaded. With
+    mode "upsert" only new and changed rows are written (see upsert_table)
+    and the counts of inserted, updated and unchanged rows are returned.
+    With mode "merge" the rows from the first year in df onward are
+    replaced (see merge_table). Rows are streamed to COPY in chunks of
+    copy_chunk_size rows, as CSV or, with copy_format="binary", in
+    PostgreSQL's binary format. The load latency and rows loaded are
+    recorded in TELEMETRY.
+    """
+    with TELEMETRY.timed("upload", table=upload_table):
+        result = _upload_table(
+            df,
+            upload_schema,
+            upload_table,
+            bitio_pg_string,
+            mode=mode,
+            copy_chunk_size=copy_chunk_size,
+            copy_format=copy_format,
+        )
+    TELEMETRY.count("rows_uploaded", len(df), table=upload_table)
+    return result
+
+
+def _upload_table(
+    df,
+    upload_schema,
+    upload_table,
+    bitio_pg_string,
+    mode,
+    copy_chunk_size,
+    copy_format,
+):
+    if mode == "upsert":
+        return upsert_table(
+            df,
+            upload_schema,
+            upload_table,
+            bitio_pg_string,
+            copy_chunk_size=copy_chunk_size,
+            copy_format=copy_format,
+        )
+    if mode == "merge":
+        return merge_table(
+            df,
+            upload_schema,
+            upload_table,
+            bitio_pg_string,
+            copy_chunk_size=copy_chunk_size,
+            copy_format=copy_format,
+        )
+    if mode != "replace":
+        raise ValueError(f"Unknown load mode: {mode}")
+    engine = get_engine(bitio_pg_string)
+    df = widen_compact_dtypes(df)
 
     with engine.begin() as conn:
         # truncate table if exists
@@ -44,19 +424,539 @@ def upload_table(df, upload_schema, upload_table, bitio_pg_string):
             schema=upload_schema,
             if_exists="append",
             index=False,
-            method=psql_insert_copy,
+            method=copy_method(copy_format, chunk_size=copy_chunk_size),
         )
 
-def download_dataset(target, pg_string):
-    engine = create_engine(pg_string)
-    # SQL for querying an entire table
-    sql = f"""
-        SELECT *
-        FROM {target};
+
+def upload_tables(tables, upload_schema, bitio_pg_string, max_workers=UPLOAD_MAX_WORKERS, **kwargs):
+    """Upload several tables concurrently over a shared connection pool
+
+    A failure loading one table does not stop the others; check the
+    "error" of each result.
+
+    Parameters
+    ----------
+    tables : dict
+        Mapping of table name to the DataFrame to load
+    upload_schema : str
+        Schema (bit.io repository) of the target tables
+    bitio_pg_string : str
+        PostgreSQL connection string
+    max_workers : int
+        Maximum number of tables loaded at the same time
+    **kwargs
+        Passed to upload_table for every table
+
+    Returns
+    -------
+    dict
+        Mapping of table name to a dict with the number of "rows", the
+        load time in "seconds", the upload_table "result" and the
+        exception raised, if any, as "error"
     """
-    # Return SQL query as a pandas dataframe
+
+    def load(item):
+        table, df = item
+        start = time.perf_counter()
+        result, error = None, None
+        try:
+            result = upload_table(df, upload_schema, table, bitio_pg_string, **kwargs)
+        except Exception as e:
+            error = e
+        return table, {
+            "rows": len(df),
+            "seconds": time.perf_counter() - start,
+            "result": result,
+            "error": error,
+        }
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        return dict(pool.map(load, tables.items()))
+
+
+def _conflict_target(keys):
+    """Format key columns or expressions as an ON CONFLICT target"""
+    return ", ".join(k if k.startswith('"') else f"({k})" for k in keys)
+
+
+def upsert_table(
+    df,
+    upload_schema,
+    upload_table,
+    bitio_pg_string,
+    keys=UPSERT_KEYS,
+    copy_chunk_size=COPY_CHUNK_ROWS,
+    copy_format="csv",
+):
+    """Insert new rows and update changed rows of a table from df
+
+    df is copied into a temporary staging table and merged into the target
+    with INSERT ... ON CONFLICT, so unchanged rows are not rewritten and
+    readers never see an empty table. The target table and a unique index
+    on keys are created if they do not exist.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Rows to load
+    upload_schema : str
+        Schema (bit.io repository) of the target table
+    upload_table : str
+        Name of the target table
+    bitio_pg_string : str
+        PostgreSQL connection string
+    keys : tuple of str
+        Quoted column names or SQL expressions uniquely identifying a row
+    copy_chunk_size : int
+        Number of rows serialized at a time when copying to the staging table
+    copy_format : str
+        "csv" or "binary" COPY format for the staging table
+
+    Returns
+    -------
+    dict
+        Number of rows "inserted", "updated" and "unchanged"
+    """
+    engine = get_engine(bitio_pg_string)
+    df = widen_compact_dtypes(df)
+    target = f'"{upload_schema}"."{upload_table}"'
+    stage = f"{upload_table}_stage"
+    columns = [f'"{c}"' for c in df.columns]
+    key_columns = {k for k in keys if k.startswith('"')}
+    updates = [c for c in columns if c not in key_columns]
+
     with engine.begin() as conn:
+        if not engine.dialect.has_table(
+            connection=conn, table_name=upload_table, schema=upload_schema
+        ):
+            df.head(0).to_sql(
+                upload_table, conn, schema=upload_schema, index=False
+            )
+        conn.execute(
+            f'CREATE UNIQUE INDEX IF NOT EXISTS "{upload_table}_upsert_key" '
+            f"ON {target} ({', '.join(keys)})"
+        )
+        conn.execute(
+            f'CREATE TEMP TABLE "{stage}" (LIKE {target} INCLUDING DEFAULTS) '
+            "ON COMMIT DROP"
+        )
+        df.to_sql(
+            stage,
+            conn,
+            if_exists="append",
+            index=False,
+            method=copy_method(copy_format, chunk_size=copy_chunk_size),
+        )
+        # xmax is 0 only for freshly inserted rows; unchanged rows are
+        # filtered out by the WHERE clause and not returned at all
+        inserted, updated = conn.execute(
+            f"""
+            WITH upserted AS (
+                INSERT INTO {target} AS t ({", ".join(columns)})
+                SELECT DISTINCT ON ({", ".join(keys)}) {", ".join(columns)}
+                FROM "{stage}"
+                ON CONFLICT ({_conflict_target(keys)}) DO UPDATE
+                SET {", ".join(f"{c} = EXCLUDED.{c}" for c in updates)}
+                WHERE ({", ".join(f"t.{c}" for c in updates)})
+                    IS DISTINCT FROM
+                    ({", ".join(f"EXCLUDED.{c}" for c in updates)})
+                RETURNING (xmax = 0) AS inserted
+            )
+            SELECT
+                count(*) FILTER (WHERE inserted),
+                count(*) FILTER (WHERE NOT inserted)
+            FROM upserted;
+            """
+        ).one()
+
+    return {
+        "inserted": inserted,
+        "updated": updated,
+        "unchanged": len(df) - inserted - updated,
+    }
+
+
+def merge_table(
+    df,
+    upload_schema,
+    upload_table,
+    bitio_pg_string,
+    since_year=None,
+    copy_chunk_size=COPY_CHUNK_ROWS,
+    copy_format="csv",
+    series=None,
+):
+    """Replace the rows of a table from since_year onward with df
+
+    Rows before since_year are kept, so df only needs to contain the
+    re-downloaded years. since_year defaults to the first year in df. If
+    series is given, only the rows of those series are replaced. The
+    table is created if it does not exist. An empty df leaves the table
+    unchanged.
+    """
+    if df.empty:
+        return None
+    if since_year is None:
+        since_year = df["year"].min()
+    engine = get_engine(bitio_pg_string)
+    df = widen_compact_dtypes(df)
+
+    with engine.begin() as conn:
+        if engine.dialect.has_table(
+            connection=conn, table_name=upload_table, schema=upload_schema
+        ):
+            sql = (
+                f'DELETE FROM "{upload_schema}"."{upload_table}" '
+                f'WHERE "year" >= {int(since_year)}'
+            )
+            if series is None:
+                conn.execute(sql)
+            else:
+                conn.execute(
+                    sql + ' AND "series" = ANY(%(series)s)',
+                    {"series": [str(x) for x in series]},
+                )
+        df.to_sql(
+            upload_table,
+            conn,
+            schema=upload_schema,
+            if_exists="append",
+            index=False,
+            method=copy_method(copy_format, chunk_size=copy_chunk_size),
+        )
+
+
+def get_high_water_mark(upload_schema, upload_table, bitio_pg_string, column="date"):
+    """Return the latest value of a column, or None if the table is missing"""
+    engine = get_engine(bitio_pg_string)
+
+    with engine.begin() as conn:
+        if not engine.dialect.has_table(
+            connection=conn, table_name=upload_table, schema=upload_schema
+        ):
+            return None
+        return conn.execute(
+            f'SELECT max("{column}") FROM "{upload_schema}"."{upload_table}"'
+        ).scalar()
+
+
+class SnapshotWriter:
+    """Write a local snapshot of a table, one DataFrame at a time
+
+    Snapshots are Arrow IPC files under root/table, partitioned by the
+    JOLTS element of the series and by seasonal adjustment
+    (element=QU/seasonal_adjustment=S/...). Files are uncompressed so they
+    can be memory-mapped by read_snapshot. Nothing is visible to readers
+    until commit, which replaces the previous snapshot of the table.
+
+    If since_year is given, the written rows only replace the rows of the
+    previous snapshot from since_year onward. A writer is not thread-safe.
+    """
+
+    def __init__(self, table, root=SNAPSHOT_DIR, since_year=None):
+        self.table = table
+        self.root = root
+        self.path = os.path.join(root, table)
+        self.since_year = since_year
+        self._staging = f"{self.path}.{uuid.uuid4().hex}.tmp"
+        self._parts = 0
+
+    def write(self, df):
+        """Add the rows of df to the snapshot"""
+        df = widen_compact_dtypes(df)
+        df = df.assign(
+            **{
+                c: df[c].astype(df[c].cat.categories.dtype)
+                for c in df.columns
+                if isinstance(df[c].dtype, pd.CategoricalDtype)
+            }
+        )
+        keys = pd.DataFrame(
+            {
+                "element": decode_jolts_ids(df["series"].to_numpy(), ["element"])[
+                    "element"
+                ],
+                "seasonal_adjustment": df["seasonal_adjustment"].astype(str),
+            }
+        )
+        groups = keys.groupby(["element", "seasonal_adjustment"]).indices
+        for (element, sa), positions in groups.items():
+            directory = os.path.join(
+                self._staging, f"element={element}", f"seasonal_adjustment={sa}"
+            )
+            os.makedirs(directory, exist_ok=True)
+            part = df.iloc[positions].drop(columns="seasonal_adjustment")
+            feather.write_feather(
+                pa.Table.from_pandas(part, preserve_index=False),
+                os.path.join(directory, f"part-{self._parts}.arrow"),
+                compression="uncompressed",
+            )
+            self._parts += 1
+
+    def commit(self):
+        """Replace the previous snapshot of the table with the written rows
+
+        Returns False, and leaves any previous snapshot in place, if the
+        written rows start at since_year but there is no previous snapshot
+        to take the earlier rows from.
+        """
+        if self.since_year is not None:
+            if not os.path.isdir(self.path):
+                self.abort()
+                return False
+            kept = read_snapshot(
+                self.table, self.root, filters=[("year", "<", int(self.since_year))]
+            )
+            if len(kept):
+                self.write(kept)
+        os.makedirs(self._staging, exist_ok=True)
+        previous = f"{self.path}.{uuid.uuid4().hex}.old"
+        if os.path.isdir(self.path):
+            os.rename(self.path, previous)
+        os.rename(self._staging, self.path)
+        shutil.rmtree(previous, ignore_errors=True)
+        return True
+
+    def abort(self):
+        """Discard the written rows"""
+        shutil.rmtree(self._staging, ignore_errors=True)
+
+
+def write_snapshot(df, table, root=SNAPSHOT_DIR, since_year=None):
+    """Write df as the local snapshot of a table (see SnapshotWriter)"""
+    writer = SnapshotWriter(table, root, since_year=since_year)
+    try:
+        writer.write(df)
+    except Exception:
+        writer.abort()
+        raise
+    return writer.commit()
+
+
+def read_snapshot(table, root=SNAPSHOT_DIR, columns=None, filters=None):
+    """Read the local snapshot of a table
+
+    Files are memory-mapped, only the requested columns are read, and
+    partitions that cannot match the filters are skipped.
+
+    Parameters
+    ----------
+    table : str
+        Name of the table
+    root : str
+        Directory of the snapshots
+    columns : list of str or None
+        Columns to read; None for every column of the table
+    filters : list of tuple or None
+        (column, op, value) conditions that rows must all meet (see
+        filters.py)
+
+    Returns
+    -------
+    pandas.DataFrame
+    """
+    path = os.path.join(root, table)
+    if not os.path.isdir(path):
+        raise FileNotFoundError(f"No snapshot of {table} in {root}")
+    dataset = ds.dataset(
+        path,
+        format="ipc",
+        partitioning="hive",
+        filesystem=fs.LocalFileSystem(use_mmap=True),
+    )
+    if columns is None:
+        # element is only a partition key
+        columns = [c for c in dataset.schema.names if c != "element"]
+    return dataset.to_table(
+        columns=list(columns), filter=arrow_expression(filters, dataset.schema)
+    ).to_pandas()
+
+
+def load_dataset(
+    table,
+    upload_schema,
+    pg_string,
+    root=SNAPSHOT_DIR,
+    columns=None,
+    filters=None,
+    pool_size=None,
+):
+    """Load a table from its local snapshot, or from bit.io if there is none
+
+    Only the given columns and the rows meeting filters are loaded (see
+    read_snapshot and download_dataset). No connection is made, and
+    pg_string may be None, if the table has a snapshot. pool_size is the
+    size of the connection pool used if it does not (see get_engine).
+    """
+    try:
+        return read_snapshot(table, root, columns=columns, filters=filters)
+    except FileNotFoundError:
+        get_engine(pg_string, pool_size=pool_size)
+        return download_dataset(
+            f'"{upload_schema}"."{table}"', pg_string, columns=columns, filters=filters
+        )
+
+
+def load_datasets(
+    tables,
+    upload_schema,
+    pg_string,
+    root=SNAPSHOT_DIR,
+    columns=None,
+    filters=None,
+    max_workers=UPLOAD_MAX_WORKERS,
+):
+    """Load several tables concurrently with load_dataset
+
+    Tables without a local snapshot are downloaded at the same time over
+    the shared connection pool, so loading several tables takes about as
+    long as loading the largest one. The pool is only created if a table
+    has no snapshot.
+
+    Parameters
+    ----------
+    tables : list of str
+        Names of the tables
+    upload_schema : str
+        Schema (bit.io repository) of the tables
+    pg_string : str or None
+        PostgreSQL connection string; may be None if every table has a
+        snapshot
+    root : str
+        Directory of the snapshots
+    columns : list of str or None
+        Columns to load from every table; None for every column
+    filters : list of tuple or None
+        (column, op, value) conditions applied to every table
+    max_workers : int
+        Maximum number of tables loaded at the same time
+
+    Returns
+    -------
+    dict
+        Mapping of table name to its DataFrame, in the order of tables
+    """
+
+    def load(table):
+        return load_dataset(
+            table,
+            upload_schema,
+            pg_string,
+            root=root,
+            columns=columns,
+            filters=filters,
+            pool_size=max_workers,
+        )
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        return dict(zip(tables, pool.map(load, tables)))
+
+
+# PostgreSQL type OIDs of date and time columns
+_PG_DATETIME_TYPES = {1082, 1114, 1184}
+# PostgreSQL type OIDs of text columns
+_PG_TEXT_TYPES = {18, 25, 1042, 1043}
+
+
+def _select_sql(target, columns=None, filters=None, paramstyle="named"):
+    select = "*"
+    if columns:
+        select = ", ".join('"{}"'.format(c.replace('"', '""')) for c in columns)
+    where, params = sql_where(filters, paramstyle=paramstyle)
+    return f"SELECT {select} FROM {target}{where}", params
+
+
+def _read_copy(conn, sql, params):
+    """Read a query through COPY (query) TO STDOUT and parse it with read_csv
+
+    Rows are copied into a spooled temporary file, so large results do
+    not build Python objects row by row. Column types are taken from the
+    query description.
+    """
+    with conn.connection.cursor() as cur:
+        query = cur.mogrify(sql, params).decode()
+        cur.execute(f"SELECT * FROM ({query}) AS q LIMIT 0")
+        description = cur.description
+        with SpooledTemporaryFile(max_size=COPY_SPOOL_BYTES, mode="w+b") as buf:
+            cur.copy_expert(
+                f"COPY ({query}) TO STDOUT WITH (FORMAT csv, NULL '\\N')",
+                buf,
+                size=COPY_READ_SIZE,
+            )
+            TELEMETRY.count("bytes_in", buf.tell(), source="db")
+            buf.seek(0)
+            return pd.read_csv(
+                buf,
+                header=None,
+                names=[d.name for d in description],
+                dtype={d.name: str for d in description if d.type_code in _PG_TEXT_TYPES},
+                parse_dates=[
+                    d.name for d in description if d.type_code in _PG_DATETIME_TYPES
+                ],
+                # only NULL is missing; strings such as "nan" are kept
+                keep_default_na=False,
+                na_values=["\\N"],
+            )
+
+
+def _iter_chunks(engine, sql, params, chunksize):
+    with engine.begin() as conn:
+        conn.execute("SET statement_timeout = 60000;")
+        # rows are fetched from a server-side cursor chunksize at a time
+        streaming = conn.execution_options(stream_results=True)
+        for chunk in pd.read_sql(text(sql), streaming, params=params, chunksize=chunksize):
+            TELEMETRY.count("rows_downloaded", len(chunk))
+            yield chunk
+
+
+def download_dataset(
+    target, pg_string, columns=None, filters=None, method="copy", chunksize=None
+):
+    """Query a table into a DataFrame
+
+    Column selection and filters are run by the server, so only the
+    requested data is transferred.
+
+    Parameters
+    ----------
+    target : str
+        Quoted, schema-qualified table name
+    pg_string : str
+        PostgreSQL connection string
+    columns : list of str or None
+        Columns to select; None for every column
+    filters : list of tuple or None
+        (column, op, value) conditions that rows must all meet (see
+        filters.py)
+    method : str
+        "copy" to stream the rows with COPY TO STDOUT into read_csv, or
+        "read_sql" to fetch them with pandas.read_sql
+    chunksize : int or None
+        If given, return an iterator of DataFrames of at most chunksize
+        rows, read from a server-side cursor so memory use is bounded
+
+    Returns
+    -------
+    pandas.DataFrame or iterator of pandas.DataFrame
+
+    The query latency and rows downloaded are recorded in TELEMETRY.
+    """
+    engine = get_engine(pg_string)
+    if chunksize is not None:
+        sql, params = _select_sql(target, columns, filters)
+        return _iter_chunks(engine, sql, params, chunksize)
+    if method not in ("copy", "read_sql"):
+        raise ValueError(f"Unknown download method: {method}")
+
+    # Return SQL query as a pandas dataframe
+    with TELEMETRY.timed("download", method=method), engine.begin() as conn:
         # Set 1 minute statement timeout (units are milliseconds)
         conn.execute("SET statement_timeout = 60000;")
-        df = pd.read_sql(sql, conn)
+        if method == "copy":
+            sql, params = _select_sql(target, columns, filters, paramstyle="pyformat")
+            df = _read_copy(conn, sql, params)
+        else:
+            sql, params = _select_sql(target, columns, filters)
+            df = pd.read_sql(text(sql), conn, params=params)
+    TELEMETRY.count("rows_downloaded", len(df))
     return df
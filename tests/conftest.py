@@ -0,0 +1,85 @@
+import json
+import os
+import sys
+import zlib
+
+import pandas as pd
+import pytest
+
+# Modules in src/ import each other by their flat names
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import bls_query  # noqa: E402
+import pipeline  # noqa: E402
+
+
+class FakeResponse:
+    def __init__(self, payload):
+        self.content = json.dumps(payload).encode("utf-8")
+        self.status_code = 200
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class FakeBlsSession:
+    """Stand-in for requests.Session answering BLS API requests
+
+    Every series has deterministic monthly values (and annual averages if
+    requested) for each year asked for. Each request is recorded in calls.
+    """
+
+    def __init__(self):
+        self.calls = []
+
+    def post(self, url, data=None, headers=None, **kwargs):
+        request = json.loads(data)
+        self.calls.append(request)
+        periods = [f"M{m:02d}" for m in range(1, 13)]
+        if request.get("annualaverage") == "true":
+            periods.append("M13")
+        years = range(int(request["endyear"]), int(request["startyear"]) - 1, -1)
+        series = [
+            {
+                "seriesID": series_id,
+                "data": [
+                    {
+                        "year": str(year),
+                        "period": period,
+                        "periodName": period,
+                        "value": f"{zlib.crc32(f'{series_id}{year}{period}'.encode()) % 80 / 10:.1f}",
+                        "footnotes": [{"code": "P", "text": "preliminary"}]
+                        if year == int(request["endyear"])
+                        else [{}],
+                    }
+                    for year in years
+                    for period in reversed(periods)
+                ],
+            }
+            for series_id in request["seriesid"]
+        ]
+        return FakeResponse({"status": "REQUEST_SUCCEEDED", "Results": {"series": series}})
+
+
+@pytest.fixture
+def fips():
+    return pd.DataFrame({"state_code": ["00", "06"], "state_text": ["Total US", "California"]})
+
+
+@pytest.fixture
+def bls_api(monkeypatch, tmp_path, fips):
+    """Answer BLS API requests offline, without caching or rate limits
+
+    State FIPS codes come from the fips fixture. Returns the FakeBlsSession.
+    """
+    session = FakeBlsSession()
+    monkeypatch.setattr(bls_query, "_get_session", lambda: session)
+    monkeypatch.setattr(bls_query.BLS_CACHE, "path", str(tmp_path / "responses"))
+    monkeypatch.setattr(bls_query.BLS_CACHE, "_size", None)
+    monkeypatch.setattr(bls_query.BLS_RATE_LIMITER, "rate", 1e9)
+    monkeypatch.setattr(bls_query.BLS_RATE_LIMITER, "capacity", 10**9)
+    monkeypatch.setattr(pipeline, "get_state_fips_codes", lambda: fips)
+    return session
@@ -0,0 +1,110 @@
+import numpy as np
+import pytest
+
+import bls_flatfile
+from bls_flatfile import read_flatfile, select_series
+
+QU_US = "JTS000000000000000QUR"
+QU_CA = "JTS000000060000000QUR"
+HI_US = "JTS000000000000000HIR"
+
+# Rows as in the BLS files: padded series IDs and values, oldest first
+ROWS = [
+    (QU_US, 2019, "M12", "2.3", ""),
+    (QU_US, 2020, "M01", "2.4", "P"),
+    (QU_US, 2020, "M02", "-", ""),
+    (QU_CA, 2019, "M12", "2.0", "P,R"),
+    (QU_CA, 2020, "M01", "2.1", ""),
+    (HI_US, 2020, "M01", "3.9", ""),
+    (QU_US, 2021, "M13", "2.7", "R"),
+]
+
+
+@pytest.fixture
+def flatfile(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        bls_flatfile,
+        "reference_labels",
+        lambda name: {"P": "preliminary", "R": "revised"},
+    )
+    path = tmp_path / "jt.data.5.Quits"
+    lines = ["series_id                     \tyear\tperiod\t       value\tfootnote_codes"]
+    lines += [
+        f"{series:<30}\t{year}\t{period}\t{value:>12}\t{codes}"
+        for series, year, period, value, codes in ROWS
+    ]
+    path.write_text("\r\n".join(lines) + "\r\n")
+    return str(path)
+
+
+def _read(flatfile, series_ids, start_year=2000, end_year=2030, **kwargs):
+    return read_flatfile(
+        "jt.data.5.Quits", series_ids, start_year, end_year, local_path=flatfile, **kwargs
+    )
+
+
+@pytest.mark.parametrize("chunksize", [2, 100])
+@pytest.mark.parametrize("memory_map", [True, False])
+def test_read_flatfile_keeps_requested_series_and_years(flatfile, chunksize, memory_map):
+    ids, columns, footnotes = _read(
+        flatfile,
+        [QU_US, QU_CA, "JTS000000010000000QUR"],
+        start_year=2020,
+        end_year=2020,
+        chunksize=chunksize,
+        memory_map=memory_map,
+    )
+    # series missing from the file are left out
+    assert ids == [QU_US, QU_CA]
+    rows = [
+        (ids[s], y, m, v)
+        for s, y, m, v in zip(columns["series"], columns["year"], columns["month"], columns["value"])
+    ]
+    assert rows[0] == (QU_US, 2020, 1, 2.4)
+    assert rows[1][:3] == (QU_US, 2020, 2) and np.isnan(rows[1][3])
+    assert rows[2] == (QU_CA, 2020, 1, 2.1)
+    assert len(rows) == 3
+    assert columns["year"].dtype == np.int64
+    assert columns["value"].dtype == np.float64
+
+
+def test_read_flatfile_maps_the_first_footnote(flatfile):
+    ids, columns, footnotes = _read(flatfile, [QU_US, QU_CA])
+    labels = {
+        (ids[s], y, m): footnotes[f]
+        for s, y, m, f in zip(columns["series"], columns["year"], columns["month"], columns["footnote"])
+    }
+    assert labels[(QU_US, 2020, 1)] == "preliminary"
+    assert labels[(QU_CA, 2019, 12)] == "preliminary"
+    assert labels[(QU_US, 2021, 13)] == "revised"
+    assert np.isnan(labels[(QU_US, 2019, 12)])
+
+
+def test_read_flatfile_without_matches(flatfile):
+    ids, columns, footnotes = _read(flatfile, ["JTS000000010000000QUR"])
+    assert ids == []
+    assert all(len(x) == 0 for x in columns.values())
+
+
+def test_select_series_orders_rows_like_the_api(flatfile):
+    parsed = _read(flatfile, [QU_US, QU_CA])
+    ids, columns, _ = select_series(parsed, [QU_CA, "JTS000000010000000QUR", QU_US])
+    assert ids == [QU_CA, QU_US]
+    rows = list(zip(columns["series"], columns["year"], columns["month"]))
+    # by series in the requested order, newest first
+    assert rows == [
+        (0, 2020, 1),
+        (0, 2019, 12),
+        (1, 2021, 13),
+        (1, 2020, 2),
+        (1, 2020, 1),
+        (1, 2019, 12),
+    ]
+
+
+def test_select_series_from_a_start_year(flatfile):
+    parsed = _read(flatfile, [QU_US, QU_CA])
+    ids, columns, _ = select_series(parsed, [QU_US], start_year=2020)
+    assert ids == [QU_US]
+    assert list(zip(columns["year"], columns["month"])) == [(2021, 13), (2020, 2), (2020, 1)]
+    assert set(columns["series"]) == {0}
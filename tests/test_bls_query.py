@@ -0,0 +1,170 @@
+import datetime
+import hashlib
+import json
+import os
+from types import SimpleNamespace
+
+import pytest
+
+import bls_query
+from bls_query import (
+    BLS_HISTORY_TTL,
+    BLS_MAX_YEARS,
+    BLS_TAIL_TTL,
+    ResponseCache,
+    stitch_bls_series,
+    year_windows,
+)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Replace time.time with a clock advanced by hand"""
+    now = [1_000_000.0]
+    monkeypatch.setattr(bls_query.time, "time", lambda: now[0])
+    return now
+
+
+def test_cache_key_is_stable():
+    key = ResponseCache.key(source="bls", series_id="JTS000000000000000QUR", annual=True)
+    assert key == ResponseCache.key(annual=True, series_id="JTS000000000000000QUR", source="bls")
+    encoded = '{"annual":true,"series_id":"JTS000000000000000QUR","source":"bls"}'
+    assert key == hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+    assert key != ResponseCache.key(source="bls", series_id="JTS000000000000000QUR", annual=False)
+
+
+def test_cache_entries_expire_after_their_ttl(tmp_path, clock):
+    cache = ResponseCache(str(tmp_path))
+    cache.put("a" * 64, {"x": 1}, ttl=60)
+    cache.put("b" * 64, {"x": 2})
+    clock[0] += 60
+    assert cache.get("a" * 64) == {"x": 1}
+    clock[0] += 1
+    assert cache.get("a" * 64) is None
+    # expired entries are still there for offline runs
+    assert cache.get("a" * 64, allow_stale=True) == {"x": 1}
+    # entries without a ttl never expire
+    clock[0] += 10**9
+    assert cache.get("b" * 64) == {"x": 2}
+    assert cache.get("c" * 64) is None
+
+
+def test_cache_evicts_least_recently_used_entries(tmp_path):
+    keys = [c * 64 for c in "abc"]
+    payload = "x" * 1000
+    cache = ResponseCache(str(tmp_path))
+    cache.put(keys[0], payload)
+    entry_size = os.path.getsize(cache._entry_path(keys[0]))
+    cache = ResponseCache(str(tmp_path), max_bytes=int(2.5 * entry_size))
+    cache.put(keys[1], payload)
+    os.utime(cache._entry_path(keys[0]), (1000, 1000))
+    os.utime(cache._entry_path(keys[1]), (2000, 2000))
+    # reading the oldest entry makes it the most recently used
+    assert cache.get(keys[0]) == payload
+
+    cache.put(keys[2], payload)
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) == payload
+    assert cache.get(keys[2]) == payload
+    assert cache._size == sum(os.path.getsize(cache._entry_path(k)) for k in (keys[0], keys[2]))
+
+
+def test_cache_ignores_corrupt_entries(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    cache.put("a" * 64, [1, 2])
+    with open(cache._entry_path("a" * 64), "w", encoding="utf-8") as f:
+        f.write(json.dumps({"created": 0})[:5])
+    assert cache.get("a" * 64) is None
+
+
+@pytest.fixture
+def this_year(monkeypatch):
+    """Make 2026 the current year"""
+
+    class Date(datetime.date):
+        @classmethod
+        def today(cls):
+            return cls(2026, 6, 1)
+
+    monkeypatch.setattr(bls_query, "datetime", SimpleNamespace(date=Date))
+
+
+def _covered_years(windows):
+    return [year for start, end, _ in windows for year in range(start, end + 1)]
+
+
+def test_year_windows_split_history_and_tail(this_year):
+    windows = year_windows(2003, 2026)
+    assert windows == [
+        (2025, 2026, BLS_TAIL_TTL),
+        (2023, 2024, BLS_HISTORY_TTL),
+        (2003, 2022, BLS_HISTORY_TTL),
+    ]
+    assert sorted(_covered_years(windows)) == list(range(2003, 2027))
+
+
+@pytest.mark.parametrize(
+    "start_year,end_year", [(2003, 2026), (1990, 2026), (2003, 2010), (2025, 2026), (2026, 2026)]
+)
+def test_year_windows_respect_the_api_limit(this_year, start_year, end_year):
+    windows = year_windows(start_year, end_year)
+    assert all(end - start + 1 <= BLS_MAX_YEARS for start, end, _ in windows)
+    # every year once, without overlaps
+    assert sorted(_covered_years(windows)) == list(range(start_year, end_year + 1))
+    assert windows == sorted(windows, reverse=True)
+    for start, end, ttl in windows:
+        assert ttl == (BLS_TAIL_TTL if start >= 2025 else BLS_HISTORY_TTL)
+
+
+def test_year_windows_shard_long_tails(this_year):
+    windows = year_windows(2020, 2026, revision_years=5, max_years=2)
+    assert windows == [
+        (2026, 2026, BLS_TAIL_TTL),
+        (2024, 2025, BLS_TAIL_TTL),
+        (2022, 2023, BLS_TAIL_TTL),
+        (2020, 2021, BLS_HISTORY_TTL),
+    ]
+
+
+def test_year_windows_keep_historical_shards_as_years_pass(this_year):
+    # shards are aligned on the start year, so their cache entries survive
+    assert (2003, 2022, BLS_HISTORY_TTL) in year_windows(2003, 2026)
+    assert (2003, 2022, BLS_HISTORY_TTL) in year_windows(2003, 2026, revision_years=1)
+
+
+def _observation(year, period, value):
+    return {"year": str(year), "period": period, "value": value, "footnotes": [{}]}
+
+
+def test_stitch_bls_series_joins_overlapping_windows():
+    newest = [
+        {"seriesID": "A", "data": [_observation(2024, "M01", "new"), _observation(2023, "M12", "new")]},
+        {"seriesID": "B", "data": [_observation(2024, "M01", "b")]},
+    ]
+    oldest = [
+        {"seriesID": "B", "data": [_observation(2023, "M12", "b")]},
+        {"seriesID": "C", "data": []},
+        {"seriesID": "A", "data": [_observation(2023, "M12", "old"), _observation(2023, "M11", "old")]},
+    ]
+    stitched = stitch_bls_series(newest + oldest)
+    assert [s["seriesID"] for s in stitched] == ["A", "B", "C"]
+    # observations of the newest window win
+    assert [(x["year"], x["period"], x["value"]) for x in stitched[0]["data"]] == [
+        ("2024", "M01", "new"),
+        ("2023", "M12", "new"),
+        ("2023", "M11", "old"),
+    ]
+    assert [x["period"] for x in stitched[1]["data"]] == ["M01", "M12"]
+    assert stitched[2]["data"] == []
+    assert stitch_bls_series([]) == []
+
+
+def test_fetch_bls_requests_stitches_windows(bls_api, this_year):
+    plan = [(["JTS000000000000000QUR", "JTS000000060000000QUR"], False)]
+    results = bls_query.fetch_bls_requests("test", plan, 2003, 2026, max_workers=2, cache=None)
+    assert len(bls_api.calls) == 3
+    assert [s["seriesID"] for s in results[0]] == plan[0][0]
+    for series in results[0]:
+        keys = [(int(x["year"]), x["period"]) for x in series["data"]]
+        assert keys == sorted(keys, reverse=True)
+        assert len(keys) == len(set(keys)) == 24 * 12
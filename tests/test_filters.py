@@ -0,0 +1,71 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pytest
+from sqlalchemy import create_engine, text
+
+from filters import apply_filters, arrow_expression, sql_where
+
+# PostgreSQL database for the SQL tests; they are skipped if it is not set
+TEST_PG_STRING = os.environ.get("TEST_PG_STRING")
+
+DF = pd.DataFrame(
+    {
+        "series": ["a", None, "c", "d"],
+        "value": [1.0, 2.0, np.nan, 4.0],
+    }
+)
+# Each filter, with the rows it selects: nulls never meet a comparison
+CASES = [
+    ([("value", "!=", 1.0)], ["d"]),
+    ([("value", "not in", [1.0])], ["d"]),
+    ([("series", "!=", "a")], ["c", "d"]),
+    ([("series", "not in", ["a", "c"])], ["d"]),
+    ([("value", "is null", None)], ["c"]),
+]
+
+
+def _selected(df):
+    return sorted(x for x in df["series"] if isinstance(x, str))
+
+
+@pytest.mark.parametrize("filters,expected", CASES)
+def test_apply_filters_nulls(filters, expected):
+    assert _selected(apply_filters(DF, filters)) == expected
+
+
+@pytest.mark.parametrize("filters,expected", CASES)
+def test_arrow_expression_nulls(filters, expected):
+    dataset = ds.dataset(pa.Table.from_pandas(DF, preserve_index=False))
+    table = dataset.to_table(filter=arrow_expression(filters, dataset.schema))
+    assert _selected(table.to_pandas()) == expected
+
+
+def _sql_rows(pg_string, filters, schema=None):
+    engine = create_engine(pg_string)
+    table = "test_filters"
+    with engine.begin() as conn:
+        DF.to_sql(table, conn, schema=schema, if_exists="replace", index=False)
+        target = f'"{schema}"."{table}"' if schema else f'"{table}"'
+        try:
+            where, params = sql_where(filters)
+            return pd.read_sql(text(f"SELECT * FROM {target}{where}"), conn, params=params)
+        finally:
+            conn.execute(text(f"DROP TABLE {target}"))
+
+
+@pytest.mark.parametrize(
+    "filters,expected", [x for x in CASES if x[0][0][1] != "not in"]
+)
+def test_sql_where_nulls_sqlite(filters, expected):
+    # "in" and "not in" compile to the PostgreSQL ANY operator
+    assert _selected(_sql_rows("sqlite://", filters)) == expected
+
+
+@pytest.mark.skipif(TEST_PG_STRING is None, reason="TEST_PG_STRING is not set")
+@pytest.mark.parametrize("filters,expected", CASES)
+def test_sql_where_nulls_postgres(filters, expected):
+    assert _selected(_sql_rows(TEST_PG_STRING, filters)) == expected
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from bls_query import construct_jolts_id
+from jolts_codec import JOLTS_ID_FIELDS, JOLTS_ID_WIDTH, decode_jolts_ids, encode_jolts_ids
+
+IDS = ["JTS000000000000000QUR", "JTU510000060000000HIL", "JTS000000480000000JOR"]
+
+
+def test_encode_defaults():
+    assert encode_jolts_ids().tolist() == "JTS000000000000000QUR"
+    assert str(encode_jolts_ids(state="06", element="HI")) == "JTS000000060000000HIR"
+
+
+def test_encode_broadcasts_codes():
+    ids = encode_jolts_ids(
+        sa=np.array(["S", "U"])[:, None], state=np.array(["00", "06", "48"])[None, :]
+    )
+    assert ids.shape == (2, 3)
+    assert ids[1, 2] == "JTU000000480000000QUR"
+    assert ids.dtype.kind == "U"
+
+
+def test_round_trip():
+    decoded = decode_jolts_ids(IDS)
+    assert [name for name, _ in JOLTS_ID_FIELDS] == list(decoded)
+    assert encode_jolts_ids(**decoded).tolist() == IDS
+    assert decoded["industry"].tolist() == ["000000", "510000", "000000"]
+    assert decoded["rate_level"].tolist() == ["R", "L", "R"]
+
+
+def test_decode_selected_fields_of_padded_and_byte_ids():
+    padded = [x.ljust(30) for x in IDS]
+    decoded = decode_jolts_ids(np.array(padded, dtype="S30"), fields=["state", "element"])
+    assert list(decoded) == ["state", "element"]
+    assert decoded["state"].tolist() == ["00", "06", "48"]
+    assert decoded["element"].tolist() == ["QU", "HI", "JO"]
+
+
+def test_decode_empty():
+    assert decode_jolts_ids(np.array([], dtype=str))["state"].tolist() == []
+
+
+def test_matches_construct_jolts_id():
+    assert construct_jolts_id(state="06", element="HI", rate_level="L") == "JTS000000060000000HIL"
+
+
+@pytest.mark.parametrize(
+    "codes",
+    [
+        {"state": "6"},
+        {"state": "006"},
+        {"industry": ["000000", "51000"]},
+        {"state": "0 6"},
+        {"element": "QÜ"},
+        {"sa": ""},
+    ],
+)
+def test_encode_rejects_invalid_widths(codes):
+    with pytest.raises(ValueError, match="must be"):
+        encode_jolts_ids(**codes)
+
+
+@pytest.mark.parametrize(
+    "series_id", ["JTS00000000000000QUR", "JTS000000000000000QURX", "JTS000000000000000QÜR"]
+)
+def test_decode_rejects_invalid_ids(series_id):
+    assert len(IDS[0]) == JOLTS_ID_WIDTH
+    with pytest.raises(ValueError, match="series IDs must be 21 characters"):
+        decode_jolts_ids([IDS[0], series_id])
@@ -0,0 +1,190 @@
+import gc
+import os
+import shutil
+import threading
+import time
+import weakref
+
+import pandas as pd
+import pytest
+
+import bls_query
+from pipeline import PipelineConfig, TableSpec, Task, run_dag, run_pipeline
+from upload_download_bitdotio import download_dataset, get_engine
+
+# PostgreSQL database for the end-to-end tests; they are skipped if it is not set
+TEST_PG_STRING = os.environ.get("TEST_PG_STRING")
+WORKERS = {"fetch": 2, "parse": 2, "upload": 1}
+
+
+class Frame:
+    """Stand-in for a large intermediate result"""
+
+
+def _fail():
+    raise RuntimeError("boom")
+
+
+def test_results_flow_through_dependencies():
+    tasks = [
+        Task("a", lambda: 2),
+        Task("b", lambda: 3),
+        Task("sum", lambda a, b: a + b, ("a", "b")),
+        Task("double", lambda x: 2 * x, ("sum",)),
+    ]
+    results = run_dag(tasks, WORKERS)
+    assert results["double"].value == 10
+    assert all(r.error is None for r in results.values())
+    # intermediate values are only returned for tasks with keep set
+    assert results["sum"].value is None
+
+
+def test_keep_returns_values_of_intermediate_tasks():
+    tasks = [Task("a", lambda: 1, keep=True), Task("b", lambda a: a + 1, ("a",))]
+    results = run_dag(tasks, WORKERS)
+    assert results["a"].value == 1
+    assert results["b"].value == 2
+
+
+def test_failure_skips_dependents_only():
+    tasks = [
+        Task("bad", _fail),
+        Task("child", lambda x: x, ("bad",)),
+        Task("grandchild", lambda x: x, ("child",)),
+        Task("other", lambda: "ok"),
+    ]
+    results = run_dag(tasks, WORKERS)
+    assert isinstance(results["bad"].error, RuntimeError)
+    assert results["child"].error is results["bad"].error
+    assert results["grandchild"].error is results["bad"].error
+    assert results["other"].value == "ok"
+
+
+def test_unknown_dependency():
+    with pytest.raises(ValueError, match="unknown task"):
+        run_dag([Task("a", lambda x: x, ("missing",))], WORKERS)
+
+
+def test_dependency_cycle():
+    tasks = [
+        Task("root", lambda: 1),
+        Task("a", lambda x, y: x, ("root", "b")),
+        Task("b", lambda x: x, ("a",)),
+    ]
+    with pytest.raises(ValueError, match="cycle"):
+        run_dag(tasks, WORKERS)
+
+
+@pytest.mark.parametrize("pool", ["fetch", "upload"])
+def test_pools_bound_concurrency(pool):
+    lock = threading.Lock()
+    active = [0]
+    peak = [0]
+
+    def work():
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.02)
+        with lock:
+            active[0] -= 1
+
+    run_dag([Task(f"t{i}", work, pool=pool) for i in range(8)], WORKERS)
+    assert peak[0] == WORKERS[pool]
+
+
+def _released(ref, timeout=2.0):
+    # poll from another task until the value is no longer referenced
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        gc.collect()
+        if ref() is None:
+            return True
+        time.sleep(0.01)
+    return False
+
+
+@pytest.mark.parametrize("failing", [False, True])
+def test_values_are_released_once_dependents_start_or_are_skipped(failing):
+    refs = []
+
+    def make():
+        frame = Frame()
+        refs.append(weakref.ref(frame))
+        return frame
+
+    tasks = [
+        Task("frame", make),
+        Task("first", lambda frame: None, ("frame",)),
+        Task("gate", (lambda frame: _fail()) if failing else (lambda frame: None), ("frame",)),
+        # skipped if gate fails, so frame is never handed to it
+        Task("second", lambda frame, gate: None, ("frame", "gate")),
+        Task("check", lambda first: _released(refs[0]), ("first",), pool="upload"),
+    ]
+    results = run_dag(tasks, WORKERS)
+    assert results["check"].value is True
+
+
+TABLES = [
+    TableSpec("test_quit_rate", "Quit Rate", "QU"),
+    TableSpec("test_hire_level", "Hire Level", "HI", rate_level="L", annual=False),
+]
+
+
+def _load(schema, streaming, incremental=False):
+    config = PipelineConfig(
+        registration_key="test",
+        pg_string=TEST_PG_STRING,
+        schema=schema,
+        end_year=2026,
+        start_year=2003,
+        incremental=incremental,
+        max_series=3,
+        workers={"fetch": 3, "parse": 2, "upload": 2},
+        streaming=streaming,
+        queue_depth=2,
+        snapshot_dir="",
+        derived_metrics=False,
+    )
+    summary = run_pipeline(TABLES, config)
+    assert all(x["error"] is None for x in summary.values()), summary
+    return {
+        t.table: download_dataset(f'"{schema}"."{t.table}"', TEST_PG_STRING)
+        .sort_values(["series", "year", "month"])
+        .reset_index(drop=True)
+        for t in TABLES
+    }
+
+
+@pytest.fixture
+def schemas():
+    names = ["test_pipeline_dag", "test_pipeline_stream"]
+    with get_engine(TEST_PG_STRING).begin() as conn:
+        for name in names:
+            conn.execute(f'DROP SCHEMA IF EXISTS "{name}" CASCADE')
+            conn.execute(f'CREATE SCHEMA "{name}"')
+    yield names
+    with get_engine(TEST_PG_STRING).begin() as conn:
+        for name in names:
+            conn.execute(f'DROP SCHEMA "{name}" CASCADE')
+
+
+@pytest.mark.skipif(TEST_PG_STRING is None, reason="TEST_PG_STRING is not set")
+def test_streaming_loads_the_same_tables_as_the_dag(bls_api, schemas):
+    dag = _load(schemas[0], streaming=False)
+    dag_calls = len(bls_api.calls)
+    # several requests, each split into several year windows
+    assert dag_calls > len({tuple(x["seriesid"]) for x in bls_api.calls})
+    # request everything again rather than reading the response cache
+    shutil.rmtree(bls_query.BLS_CACHE.path)
+    bls_query.BLS_CACHE._size = None
+    stream = _load(schemas[1], streaming=True)
+    assert len(bls_api.calls) == 2 * dag_calls
+    for table, df in dag.items():
+        assert len(df) > 0
+        pd.testing.assert_frame_equal(stream[table], df)
+
+    # fragments merged into the stored rows of their series
+    stream = _load(schemas[1], streaming=True, incremental=True)
+    for table, df in dag.items():
+        pd.testing.assert_frame_equal(stream[table], df)
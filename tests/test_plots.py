@@ -0,0 +1,52 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+import plots
+
+# Three industry codes share the Manufacturing label, as in JOLTS
+INDUSTRIES = {
+    "310000": "Manufacturing",
+    "320000": "Manufacturing",
+    "330000": "Manufacturing",
+    "510000": "Information",
+}
+
+
+def _rates(offset):
+    dates = pd.date_range("2019-01-01", periods=12, freq="MS")
+    return pd.DataFrame(
+        [
+            {
+                "date": date,
+                "value": offset + i + j / 10,
+                "seasonally_adjusted": "S",
+                "industry_code": code,
+                "industry": label,
+            }
+            for i, (code, label) in enumerate(INDUSTRIES.items())
+            for j, date in enumerate(dates)
+        ]
+    )
+
+
+def test_render_turnover_charts_by_code(monkeypatch):
+    # Record the chart jobs instead of drawing them
+    monkeypatch.setattr(plots, "ProcessPoolExecutor", ThreadPoolExecutor)
+    monkeypatch.setattr(plots, "_render_turnover_chart", lambda job: job)
+    jobs = plots.render_turnover_charts(
+        _rates(1), _rates(2), _rates(3), pd.DataFrame(), by="industry", figures_dir="figures"
+    )
+    assert [job[:2] for job in jobs] == [
+        ("turnover_rates_industry_manufacturing_310000.png",
+         "Labor Turnover Rates by Month, Manufacturing (310000)"),
+        ("turnover_rates_industry_manufacturing_320000.png",
+         "Labor Turnover Rates by Month, Manufacturing (320000)"),
+        ("turnover_rates_industry_manufacturing_330000.png",
+         "Labor Turnover Rates by Month, Manufacturing (330000)"),
+        ("turnover_rates_industry_information.png", "Labor Turnover Rates by Month, Information"),
+    ]
+    # Each chart has the 12 months of its own code only
+    for i, (_, _, layoffs, quits, openings, _, _) in enumerate(jobs):
+        for offset, df in enumerate([layoffs, quits, openings], start=1):
+            assert list(df["value"]) == [offset + i + j / 10 for j in range(12)]
@@ -0,0 +1,166 @@
+import datetime
+import os
+import struct
+
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+
+from bls_query import JoltsSpec, compact_jolts_frame, concat_jolts_frames, parse_jolts_spec
+from upload_download_bitdotio import (
+    BINARY_COPY_HEADER,
+    BINARY_COPY_TRAILER,
+    binary_chunks,
+    download_dataset,
+    get_engine,
+    load_datasets,
+    upload_table,
+    widen_compact_dtypes,
+    write_snapshot,
+)
+
+# PostgreSQL database for the COPY tests; they are skipped if it is not set
+TEST_PG_STRING = os.environ.get("TEST_PG_STRING")
+
+FIPS = pd.DataFrame({"state_code": ["00", "06"], "state_text": ["Total US", "California"]})
+
+
+def _response_series(spec):
+    periods = ["M13", "M02", "M01"] if spec.annual else ["M02", "M01"]
+    return [
+        {
+            "seriesID": series_id,
+            "data": [
+                {"year": "2021", "period": p, "value": "2.3", "footnotes": [{}]}
+                for p in periods
+            ],
+        }
+        for series_id in spec.series_ids(FIPS["state_code"])
+    ]
+
+
+def _table_frame(annual, compact):
+    frames = []
+    for sa in ("S", "U"):
+        spec = JoltsSpec("Quit Rate", sa=sa, annual=annual)
+        df = parse_jolts_spec(_response_series(spec), spec, FIPS, compact=compact)
+        df["seasonal_adjustment"] = sa
+        frames.append(compact_jolts_frame(df) if compact else df)
+    return concat_jolts_frames(frames)
+
+
+@pytest.mark.parametrize("annual", [True, False])
+def test_compact_frames_create_the_same_table(annual):
+    engine = create_engine("postgresql://")
+    schemas = [
+        pd.io.sql.get_schema(
+            widen_compact_dtypes(_table_frame(annual, compact)), "quit_rate", con=engine
+        )
+        for compact in (False, True)
+    ]
+    assert schemas[0] == schemas[1]
+    assert "year BIGINT" in schemas[0]
+    assert ("month FLOAT" if annual else "month BIGINT") in schemas[0]
+
+
+def test_load_datasets_from_snapshots_without_a_database(tmp_path):
+    df = _table_frame(annual=True, compact=False)
+    write_snapshot(df, "quit_rate", root=str(tmp_path))
+    loaded = load_datasets(["quit_rate"], "repo", None, root=str(tmp_path))
+    assert len(loaded["quit_rate"]) == len(df)
+
+
+PG_EPOCH = datetime.datetime(2000, 1, 1)
+BINARY_FRAME = pd.DataFrame(
+    {
+        "label": ["Total US", None, "Café – 🙂", ""],
+        "state": pd.Categorical(["00", "06", None, "06"]),
+        "count": pd.array([1, None, -(2**62), 2**40], dtype="Int64"),
+        "value": [2.5, np.nan, -1e300, 0.0],
+        "date": pd.to_datetime(["2021-01-01", None, "1999-12-31", "2000-01-01 12:34:56.789"]),
+        "day": [
+            datetime.date(2021, 1, 1),
+            None,
+            datetime.date(1999, 12, 31),
+            datetime.date(2000, 1, 1),
+        ],
+    }
+)
+BINARY_TYPES = ["text", "text", "bigint", "double precision", "timestamp without time zone", "date"]
+
+
+def _decode_field(payload, pg_type):
+    if pg_type == "text":
+        return payload.decode("utf-8")
+    if pg_type == "bigint":
+        return struct.unpack(">q", payload)[0]
+    if pg_type == "double precision":
+        return struct.unpack(">d", payload)[0]
+    if pg_type == "date":
+        return PG_EPOCH.date() + datetime.timedelta(days=struct.unpack(">i", payload)[0])
+    return PG_EPOCH + datetime.timedelta(microseconds=struct.unpack(">q", payload)[0])
+
+
+def _decode_binary_copy(data, pg_types):
+    """Decode a binary COPY stream into a list of rows, with None for NULL"""
+    assert data.startswith(BINARY_COPY_HEADER)
+    assert data.endswith(BINARY_COPY_TRAILER)
+    pos = len(BINARY_COPY_HEADER)
+    rows = []
+    while pos < len(data) - len(BINARY_COPY_TRAILER):
+        (count,) = struct.unpack_from(">h", data, pos)
+        assert count == len(pg_types)
+        pos += 2
+        row = []
+        for pg_type in pg_types:
+            (length,) = struct.unpack_from(">i", data, pos)
+            pos += 4
+            if length == -1:
+                row.append(None)
+                continue
+            row.append(_decode_field(data[pos : pos + length], pg_type))
+            pos += length
+        rows.append(row)
+    assert pos == len(data) - len(BINARY_COPY_TRAILER)
+    return rows
+
+
+def _expected_rows(df):
+    return [
+        [None if pd.isna(x) else x for x in row]
+        for row in df.astype(object).itertuples(index=False)
+    ]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 10])
+def test_binary_copy_round_trip(chunk_size):
+    data = b"".join(binary_chunks(BINARY_FRAME, BINARY_TYPES, chunk_size=chunk_size))
+    assert _decode_binary_copy(data, BINARY_TYPES) == _expected_rows(BINARY_FRAME)
+
+
+def test_binary_copy_empty_frame():
+    data = b"".join(binary_chunks(BINARY_FRAME.iloc[:0], BINARY_TYPES))
+    assert data == BINARY_COPY_HEADER + BINARY_COPY_TRAILER
+
+
+def test_binary_copy_unsupported_type():
+    with pytest.raises(TypeError):
+        b"".join(binary_chunks(BINARY_FRAME[["value"]], ["numeric"]))
+
+
+@pytest.mark.skipif(TEST_PG_STRING is None, reason="TEST_PG_STRING is not set")
+def test_binary_copy_matches_csv():
+    # CSV COPY reads an empty string as NULL, so leave it out
+    df = BINARY_FRAME.assign(label=BINARY_FRAME["label"].replace("", "x"))
+    loaded = {}
+    for copy_format in ("csv", "binary"):
+        table = f"test_copy_{copy_format}"
+        upload_table(df, "public", table, TEST_PG_STRING, copy_format=copy_format)
+        try:
+            loaded[copy_format] = download_dataset(f'"public"."{table}"', TEST_PG_STRING)
+        finally:
+            with get_engine(TEST_PG_STRING).begin() as conn:
+                conn.execute(f'DROP TABLE "public"."{table}"')
+    pd.testing.assert_frame_equal(loaded["binary"], loaded["csv"])
+    assert loaded["binary"]["label"].tolist()[2] == "Café – 🙂"